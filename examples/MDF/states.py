@@ -62,25 +62,12 @@ def main():
         dt = 0.01
 
         duration = 2
-        t = 0
-        recorded = {}
-        times = []
-        s = []
-        while t <= duration:
-            times.append(t)
-            print("======   Evaluating at t = %s  ======" % (t))
-            if t == 0:
-                eg.evaluate()  # replace with initialize?
-            else:
-                eg.evaluate(time_increment=dt)
-
-            s.append(eg.enodes["sine_node"].evaluable_outputs["out_port"].curr_value)
-            t += dt
+        recorded = eg.run(duration, dt, record=["sine_node.out_port"])
 
         if "-nogui" not in sys.argv:
             import matplotlib.pyplot as plt
 
-            plt.plot(times, s)
+            plt.plot(recorded["time"], recorded["sine_node.out_port"])
             plt.show()
 
     if "-graph" in sys.argv:
@@ -64,39 +64,22 @@ def execute(multi=False):
 
         duration = 0.1
 
-    eg = EvaluableGraph(mod_graph, verbose)
+    eg = EvaluableGraph(mod_graph, verbose, compiled=True)
     # duration= 2
-    t = 0
-
-    times = []
-    vv = {}
-    ww = {}
 
     format = FORMAT_TENSORFLOW if "-tf" in sys.argv else FORMAT_NUMPY
 
-    while t < duration + 0.00005:
-        times.append(t)
-        print("======   Evaluating at t = %s  ======" % (t))
-        if t == 0:
-            eg.evaluate(array_format=format)  # replace with initialize?
-        else:
-            eg.evaluate(array_format=format, time_increment=dt)
-
-        for i in range(len(eg.enodes["FNpop_0"].evaluable_parameters["V"].curr_value)):
-            if not i in vv:
-                vv[i] = []
-                ww[i] = []
-            v = eg.enodes["FNpop_0"].evaluable_parameters["V"].curr_value[i]
-            w = eg.enodes["FNpop_0"].evaluable_parameters["W"].curr_value[i]
-            vv[i].append(v)
-            ww[i].append(w)
-            if i == 0:
-                print(f"    Value at {t}: v={v}, w={w}")
-        t += dt
+    recorded = eg.run(
+        duration, dt, record=["FNpop_0.V", "FNpop_0.W"], array_format=format
+    )
+    times = recorded["time"]
+    vv = recorded["FNpop_0.V"].T
+    ww = recorded["FNpop_0.W"].T
+    print(f"    Value at {times[-1]}: v={vv[0][-1]}, w={ww[0][-1]}")
 
     import matplotlib.pyplot as plt
 
-    for vi in vv:
+    for vi in range(len(vv)):
         plt.plot(times, vv[vi], label="V %.3f" % input[vi])
         plt.plot(times, ww[vi], label="W %.3f" % input[vi])
     plt.legend()
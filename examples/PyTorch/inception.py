@@ -288,6 +288,15 @@ def main():
         output,
         eg.enodes["Add_381"].evaluable_outputs["_381"].curr_value,
     )
+
+    # Evaluate the model again as a single fused ONNX model
+    eg_onnx = EvaluableGraph(graph=mdf_graph, verbose=False, backend="onnx")
+    eg_onnx.evaluate(initializer=params_dict)
+
+    assert np.allclose(
+        output,
+        eg_onnx.enodes["Add_381"].evaluable_outputs["_381"].curr_value,
+    )
     print("Passed all comparison tests!")
 
     # Output the model to JSON
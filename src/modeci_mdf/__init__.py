@@ -14,3 +14,5 @@ MODECI_MDF_VERSION = "0.3"
 
 # Version of the Python module.
 __version__ = "0.3.3"
+
+from modeci_mdf.parameter_sweep import sweep
@@ -11,27 +11,34 @@ of the :class:`EvaluableGraph` class. The external library `graph-scheduler
 conditional constraints.
 
 """
+import ast
+import builtins
+import concurrent.futures
 import functools
 import inspect
+import math
 import os
 import re
 import sys
-import sympy
 import numpy as np
 
 
 import graph_scheduler
-import onnxruntime
 
 from modeci_mdf.functions.standard import mdf_functions, create_python_expression
-from modeci_mdf.utils import is_number
+from modeci_mdf.utils import (
+    is_number,
+    get_expression_symbols,
+    expression_has_calls,
+)
+from modeci_mdf.integrators import Integrator, EulerIntegrator, get_integrator
 
 from modelspec.utils import evaluate as evaluate_params_modelspec
 from modelspec.utils import _params_info, _val_info
 from modelspec.utils import FORMAT_NUMPY
 
 from collections import OrderedDict
-from typing import Union, List, Dict, Optional, Any
+from typing import Union, List, Dict, Optional, Any, Callable, Tuple, Set, Iterable
 from modeci_mdf.mdf import (
     Function,
     Graph,
@@ -49,8 +56,22 @@ import modeci_mdf.functions.actr as actr_funcs
 
 FORMAT_DEFAULT = FORMAT_NUMPY
 
+# Evaluate with PyTorch tensors, see modeci_mdf.functions.torch
+FORMAT_TORCH = "torch"
+
 KNOWN_PARAMETERS = ["constant"]
 
+# Backends for EvaluableGraph: the reference node by node evaluation, or a single fused ONNX model for graphs composed
+# entirely of ONNX functions
+BACKEND_MDF = "mdf"
+BACKEND_ONNX = "onnx"
+
+# Maximum number of distinct string expressions kept in the compiled expression cache
+COMPILED_EXPR_CACHE_SIZE = 10000
+
+# Number of time steps buffered in memory by EvaluableGraph.run before they are written to HDF5
+RUN_CHUNK_SIZE = 10000
+
 
 def evaluate_expr(
     expr: Union[str, List[str], np.ndarray, "tf.tensor"] = None,
@@ -71,6 +92,13 @@ def evaluate_expr(
         n-dimensional array
 
     """
+    if array_format == FORMAT_TORCH:
+        import modeci_mdf.functions.torch as torch_ops
+
+        # modelspec evaluates the expression on the tensors, but returns (new) arrays as numpy ones
+        return torch_ops.to_tensor(
+            evaluate_expr(expr, func_params, FORMAT_NUMPY, verbose=verbose)
+        )
 
     e = evaluate_params_modelspec(
         expr, func_params, array_format=array_format, verbose=verbose
@@ -83,6 +111,106 @@ def evaluate_expr(
     return e
 
 
+# The modules available to compiled expressions, as for expressions evaluated by modelspec
+_COMPILED_EXPR_GLOBALS = {"__builtins__": builtins, "math": math, "numpy": np}
+
+
+@functools.lru_cache(maxsize=COMPILED_EXPR_CACHE_SIZE)
+def compile_expr(expr: str) -> Callable[[Dict[str, Any]], Any]:
+    """Compiles an expression given in string format into a Python code object once, and returns a function which
+    evaluates it against a :code:`dict` of parameters.
+
+    The returned function mirrors :func:`evaluate_expr` for the numpy array format, but avoids re-parsing the
+    expression string on every call. Anything the compiled code cannot handle is passed on to :func:`evaluate_expr`,
+    so errors are reported in exactly the same way.
+
+    Args:
+        expr: Expression to be compiled
+
+    Returns:
+        A function taking a dict of parameters and returning the value of the expression
+    """
+    for cast in (int, float):
+        try:
+            const = cast(expr)
+        except ValueError:
+            continue
+        return lambda func_params: const
+
+    try:
+        code = compile(expr, "<mdf expression>", "eval")
+    except SyntaxError:
+        return functools.partial(evaluate_expr, expr)
+
+    def _evaluate_compiled(func_params: Dict[str, Any]) -> Any:
+        if expr in func_params:
+            value = func_params[expr]
+            # Copied as by modelspec, so the result doesn't change with the parameter (e.g. a state updated in place).
+            # Other values (numbers which modelspec returns as ints where they are integral, strings, lists) are left
+            # to modelspec.
+            if type(value) == np.ndarray:
+                return np.array(value)
+            return evaluate_expr(expr, func_params)
+
+        try:
+            # func_params is only read, as the locals of the expression
+            return eval(code, _COMPILED_EXPR_GLOBALS, func_params)
+        except Exception:
+            return evaluate_expr(expr, func_params)
+
+    return _evaluate_compiled
+
+
+def evaluate_compiled_expr(
+    expr: Union[str, List[str], np.ndarray, "tf.tensor"] = None,
+    func_params: Dict[str, Any] = None,
+    array_format: str = FORMAT_DEFAULT,
+    verbose: Optional[bool] = False,
+) -> np.ndarray:
+    """Drop in replacement for :func:`evaluate_expr` used in compiled execution mode. String expressions
+    evaluated with numpy arrays are compiled once by :func:`compile_expr` and the code object is reused on
+    subsequent calls, everything else is evaluated with :func:`evaluate_expr`.
+
+    Args:
+        expr: Expression or list of expressions to be evaluated
+        func_params: A dict of parameters (e.g. :code:`{'weight': 2}`)
+        array_format: It can be a n-dimensional array or a tensor
+        verbose: If set to True provides in-depth information else verbose message is not displayed
+
+    Returns:
+        n-dimensional array
+    """
+    if type(expr) == str and func_params is not None and array_format == FORMAT_NUMPY:
+        return compile_expr(expr)(func_params)
+
+    return evaluate_expr(expr, func_params, array_format=array_format, verbose=verbose)
+
+
+def _precompile_exprs(*exprs: Any):
+    """Compile any string expressions ahead of their first evaluation"""
+    for expr in exprs:
+        if type(expr) == str:
+            compile_expr(expr)
+
+
+def _cast_floats(value: Any, dtype: Optional[np.dtype]) -> Any:
+    """Cast a floating point array or tensor to **dtype**, leaving other values (all if it is None) unchanged"""
+    if dtype is None:
+        return value
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f" and value.dtype != dtype:
+            return value.astype(dtype)
+        return value
+
+    # Tensors can only be in the graph if PyTorch has already been imported
+    torch = sys.modules.get("torch")
+    if torch is not None and isinstance(value, torch.Tensor):
+        import modeci_mdf.functions.torch as torch_ops
+
+        return torch_ops.cast_floats(value, dtype)
+    return value
+
+
 def evaluate_onnx_expr(
     expr: str,
     base_parameters: Dict[str, Any],
@@ -101,104 +229,214 @@ def evaluate_onnx_expr(
     Returns:
         Any: the return value of **expr**
     """
-    # Get the ONNX function
-    onnx_name = expr.split("(")[0].split(".")[-1]
-    onnx_function = getattr(onnx_ops, onnx_name)
-    onnx_schema = onnx_ops.get_onnx_schema(onnx_name)
-    onnx_arguments = set(
-        list(onnx_schema.attributes.keys()) + [i.name for i in onnx_schema.inputs]
-    )
-    # used to attempt to match inputs to expected onnx input types
-    onnx_typecast_mappings = {
-        onnx_schema.AttrType.INT: int,
-        onnx_schema.AttrType.FLOAT: float,
-        onnx_schema.AttrType.STRING: str,
-        onnx_schema.AttrType.INTS: functools.partial(np.array, dtype=int),
-        onnx_schema.AttrType.FLOATS: functools.partial(np.array, dtype=float),
-        onnx_schema.AttrType.STRINGS: functools.partial(np.array, dtype=str),
-        # TODO: add tensor and graph types?
-    }
+    return _OnnxCall(expr).evaluate(base_parameters, evaluated_parameters, verbose)
 
-    try:
-        has_variadic = (
-            onnx_schema.inputs[0].option == onnx_schema.FormalParameterOption.Variadic
-        )
-    except IndexError:
-        has_variadic = False
-
-    # ONNX functions expect input args or kwargs first, followed by parameters (called attributes in ONNX) as
-    # kwargs. Lets construct this.
-    kwargs_for_onnx = {}
-    for kw, arg_expr in base_parameters.items():
-
-        # If this arg is a list of args, we are dealing with a variadic argument. Expand these
-        if type(arg_expr) == str and arg_expr[0] == "[" and arg_expr[-1] == "]":
-            # Use the Python interpreter to parse this into a List[str]
-            arg_expr_list = parse_str_as_list(arg_expr[1:-1])
-            kwargs_for_onnx.update({a: evaluated_parameters[a] for a in arg_expr_list})
-        else:
-            kwargs_for_onnx[kw] = evaluated_parameters[kw]
 
-    kwargs_for_onnx = {
-        k: v
-        for k, v in kwargs_for_onnx.items()
-        if (
-            (k in onnx_arguments or has_variadic)
-            and "onnx::" not in k  # filter Evaluable__ class names
+class _OnnxCall:
+    """
+    A call to the ONNX function in an expression (see :func:`evaluate_onnx_expr`). Which of the parameters are passed
+    to the ONNX operator, and as which of its inputs and attributes, is worked out the first time it is evaluated and
+    reused as long as the names of the parameters don't change. Whether the operator needs float32 values is also
+    remembered, so it is only run with float64 values once.
+
+    Args:
+        expr: Expression for the ONNX function call, e.g. :code:`onnx_ops.add(A, B)`
+        dtype: If float32, float64 values are passed to the operator as float32 from the start, and its float32 results
+            are returned as they are. Otherwise float32 results are returned as float64.
+    """
+
+    def __init__(self, expr: str, dtype: Optional[np.dtype] = None):
+        # Get the ONNX function
+        self.onnx_name = expr.split("(")[0].split(".")[-1]
+        self.onnx_schema = onnx_ops.get_onnx_schema(self.onnx_name)
+        self.onnx_arguments = set(
+            list(self.onnx_schema.attributes.keys())
+            + [i.name for i in self.onnx_schema.inputs]
         )
-    }
 
-    # attempt to cast attributes to what onnx_function expects
-    for k, v in kwargs_for_onnx.items():
         try:
-            onnx_attr = onnx_schema.attributes[k]
-        except KeyError:
-            continue
+            self.has_variadic = (
+                self.onnx_schema.inputs[0].option
+                == self.onnx_schema.FormalParameterOption.Variadic
+            )
+        except IndexError:
+            self.has_variadic = False
+
+        self.keep_float32 = dtype == np.float32
+        self.float32 = self.keep_float32
+        self._plan_key = None
+
+    def _make_plan(self, base_parameters: Dict[str, Any]):
+        """Work out the names of the parameters which are passed to the ONNX function, and how to cast them"""
+
+        # used to attempt to match inputs to expected onnx input types
+        onnx_typecast_mappings = {
+            self.onnx_schema.AttrType.INT: int,
+            self.onnx_schema.AttrType.FLOAT: float,
+            self.onnx_schema.AttrType.STRING: str,
+            self.onnx_schema.AttrType.INTS: functools.partial(np.array, dtype=int),
+            self.onnx_schema.AttrType.FLOATS: functools.partial(np.array, dtype=float),
+            self.onnx_schema.AttrType.STRINGS: functools.partial(np.array, dtype=str),
+            # TODO: add tensor and graph types?
+        }
+
+        # ONNX functions expect input args or kwargs first, followed by parameters (called attributes in ONNX) as
+        # kwargs. Lets construct this, as a mapping from keyword to the name of the evaluated parameter.
+        sources = {}
+        for kw, arg_expr in base_parameters.items():
+
+            # If this arg is a list of args, we are dealing with a variadic argument. Expand these
+            if type(arg_expr) == str and arg_expr[0] == "[" and arg_expr[-1] == "]":
+                # Use the Python interpreter to parse this into a List[str]
+                arg_expr_list = parse_str_as_list(arg_expr[1:-1])
+                if type(arg_expr_list) != list:
+                    arg_expr_list = [arg_expr_list]
+                sources.update({a: a for a in arg_expr_list})
+            else:
+                sources[kw] = kw
 
-        try:
-            cast_type = onnx_typecast_mappings[onnx_attr.type]
-        except KeyError:
-            continue
+        sources = {
+            k: v
+            for k, v in sources.items()
+            if (
+                (k in self.onnx_arguments or self.has_variadic)
+                and "onnx::" not in k  # filter Evaluable__ class names
+            )
+        }
 
-        try:
-            kwargs_for_onnx[k] = cast_type(v)
-        except (TypeError, ValueError):
-            pass
+        self.kwarg_names = list(sources)
+        self.kwarg_sources = list(sources.values())
+        self.kwarg_casts = []
+        for k in sources:
+            try:
+                onnx_attr = self.onnx_schema.attributes[k]
+                cast_type = onnx_typecast_mappings[onnx_attr.type]
+            except KeyError:
+                cast_type = None
+            self.kwarg_casts.append(cast_type)
+
+        self.onnx_function = onnx_ops.make_onnx_kwargs_call(
+            self.onnx_schema, tuple(sources)
+        )
 
-    if verbose:
-        print(f"Evaluating ONNX function {onnx_name} with {kwargs_for_onnx}")
+    def _update_plan(self, base_parameters: Dict[str, Any]):
+        # Only string values (e.g. lists of variadic arguments) change which parameters are passed
+        key = tuple((k, v) if type(v) == str else k for k, v in base_parameters.items())
+        if key != self._plan_key:
+            self._make_plan(base_parameters)
+            self._plan_key = key
 
-    try:
-        result = onnx_function(**kwargs_for_onnx)
-    except (
-        onnxruntime.capi.onnxruntime_pybind11_state.NotImplemented,
-        onnxruntime.capi.onnxruntime_pybind11_state.Fail,
-    ) as e:
-        err = str(e)
-        if (
-            "bound to different types (tensor(double) and tensor(float)" not in err
-            and "Could not find an implementation for the node" not in err
-        ):
-            raise
-
-        # assume this is related to lack of support for float64/double
-        # for Cos, Relu (and likely others) on onnx CPUExecutionProvider
-        result = onnx_function(
-            **{
-                k: v.astype(np.float32)
-                if hasattr(v, "dtype") and v.dtype == np.float64
-                else v
-                for k, v in kwargs_for_onnx.items()
-            }
+    def evaluate_torch(
+        self,
+        base_parameters: Dict[str, Any],
+        evaluated_parameters: Dict,
+        verbose: bool = False,
+    ) -> Any:
+        """
+        Evaluate the ONNX function call on tensors, with the module in
+        :mod:`~modeci_mdf.interfaces.pytorch.mod_torch_builtins` for the operator if there is one, and otherwise with
+        onnxruntime on their numpy values. See :func:`evaluate_onnx_expr` for the arguments.
+        """
+        import modeci_mdf.functions.torch as torch_ops
+
+        self._update_plan(base_parameters)
+
+        module_class = torch_ops.get_onnx_module(self.onnx_name)
+        if module_class is not None:
+            attributes = {}
+            inputs = []
+            for name, source in zip(self.kwarg_names, self.kwarg_sources):
+                v = evaluated_parameters[source]
+                if name in self.onnx_schema.attributes:
+                    attributes[name] = torch_ops.to_numpy(v)
+                else:
+                    inputs.append(torch_ops.to_tensor(v))
+            # The variadic input is passed as a list
+            if self.has_variadic:
+                inputs = [inputs]
+
+            if verbose:
+                print(
+                    f"Evaluating ONNX function {self.onnx_name} with {module_class.__name__}"
+                )
+            try:
+                return module_class(**attributes)(*inputs)
+            except (TypeError, RuntimeError):
+                # e.g. attributes or inputs the module doesn't support
+                pass
+
+        numpy_parameters = {
+            source: torch_ops.to_numpy(evaluated_parameters[source])
+            for source in self.kwarg_sources
+        }
+        return torch_ops.to_tensor(
+            self.evaluate(base_parameters, numpy_parameters, verbose)
         )
 
-    try:
-        if result.dtype == np.float32:
-            result = result.astype(np.float64)
-    except AttributeError:
-        pass
+    def evaluate(
+        self,
+        base_parameters: Dict[str, Any],
+        evaluated_parameters: Dict,
+        verbose: bool = False,
+    ) -> Any:
+        """
+        Evaluate the ONNX function call, see :func:`evaluate_onnx_expr` for the arguments.
+        """
+        import onnxruntime
+
+        self._update_plan(base_parameters)
 
-    return result
+        # attempt to cast attributes to what onnx_function expects
+        values = []
+        for source, cast_type in zip(self.kwarg_sources, self.kwarg_casts):
+            v = evaluated_parameters[source]
+            if cast_type is not None:
+                try:
+                    v = cast_type(v)
+                except (TypeError, ValueError):
+                    pass
+            values.append(v)
+
+        if verbose:
+            print(f"Evaluating ONNX function {self.onnx_name} with {values}")
+
+        if not self.float32:
+            try:
+                result = self.onnx_function(*values)
+            except (
+                onnxruntime.capi.onnxruntime_pybind11_state.NotImplemented,
+                onnxruntime.capi.onnxruntime_pybind11_state.Fail,
+            ) as e:
+                err = str(e)
+                if (
+                    "bound to different types (tensor(double) and tensor(float)"
+                    not in err
+                    and "Could not find an implementation for" not in err
+                ):
+                    raise
+
+                # assume this is related to lack of support for float64/double
+                # for Cos, Relu (and likely others) on onnx CPUExecutionProvider,
+                # and pass float32 values from now on
+                self.float32 = True
+
+        if self.float32:
+            result = self.onnx_function(
+                *[
+                    v.astype(np.float32)
+                    if hasattr(v, "dtype") and v.dtype == np.float64
+                    else v
+                    for v in values
+                ]
+            )
+
+        try:
+            if result.dtype == np.float32 and not self.keep_float32:
+                result = result.astype(np.float64)
+        except AttributeError:
+            pass
+
+        return result
 
 
 def parse_str_as_list(s: str) -> list:
@@ -267,17 +505,220 @@ def parse_str_as_list(s: str) -> list:
         return res
 
 
+def _get_value_signature(value: Any) -> Optional[Tuple]:
+    """
+    The type, and for arrays the shape and dtype, of a value, which determine the shape and dtype of the result of
+    numpy functions applied to it. None for other values (e.g. lists), whose shape is not known without converting them.
+    """
+    if isinstance(value, np.ndarray):
+        return (np.ndarray, value.shape, value.dtype)
+    if isinstance(value, (int, float, np.generic)):
+        return (type(value),)
+    return None
+
+
+class _FunctionCall:
+    """
+    The call to an MDF function made by an :class:`EvaluableFunction` or :class:`EvaluableParameter`, resolved once so
+    that evaluating it only involves evaluating its arguments and calling the function.
+
+    If :attr:`reuse_buffer` is set, array results of the numpy implementation of the function are kept as a
+    :attr:`buffer`, into which the result is written in place (with the function's :code:`out` argument) on the next
+    call with arguments of the same types, shapes and dtypes.
+
+    Args:
+        name: The name of the function, which is looked up in :data:`~modeci_mdf.functions.standard.mdf_functions`
+        default_expr: Expression to evaluate if there is no function with this name
+        dtype: The dtype of floating point arrays, see :class:`EvaluableGraph`
+    """
+
+    def __init__(
+        self, name: Optional[str], default_expr: Any, dtype: Optional[np.dtype] = None
+    ):
+        self.name = name
+        self.python_function = None
+        self.arguments = None
+        self.actr_function = None
+
+        if name is not None and name in mdf_functions:
+            mdf_function = mdf_functions[name]
+            self.expr = create_python_expression(mdf_function["expression_string"])
+            self.python_function = mdf_function["function"]
+            self.arguments = mdf_function["arguments"]
+        else:
+            self.expr = default_expr
+
+        #: Whether the numpy implementation of the function can write its result into an existing array
+        self.supports_out = (
+            self.python_function is not None
+            and "out" in inspect.signature(self.python_function).parameters
+        )
+        self.reuse_buffer = False
+        self.buffer = None
+        # The signatures of the arguments the buffer was created for, see _get_value_signature
+        self.buffer_signature = None
+
+        self.onnx_call = None
+        if type(self.expr) == str and "onnx_ops." in self.expr:
+            self.onnx_call = _OnnxCall(self.expr, dtype)
+        elif type(self.expr) == str and "actr." in self.expr:
+            self.actr_function = getattr(
+                actr_funcs, self.expr.split("(")[0].split(".")[-1]
+            )
+
+    def evaluate(
+        self,
+        evaluate_expr: Callable,
+        base_parameters: Dict[str, Any],
+        func_params: Dict[str, Any],
+        args: Dict[str, Any],
+        array_format: str,
+        verbose: bool,
+    ) -> Any:
+        """
+        Evaluate the function call, with arguments which have already been evaluated into **func_params**.
+
+        Args:
+            evaluate_expr: The function used to evaluate expressions, :func:`evaluate_expr` or
+                :func:`evaluate_compiled_expr`
+            base_parameters: The parameters the arguments were evaluated with
+            func_params: **base_parameters** updated with the evaluated arguments
+            args: The (unevaluated) args of the function or parameter
+            array_format: The array format to use
+            verbose: If set to True provides in-depth information else verbose message is not displayed
+
+        Returns:
+            The value of the function
+        """
+        # If this is an ONNX operation, evaluate it without modelspec.
+        if self.onnx_call is not None:
+            if verbose:
+                print(f"{self.name} is evaluating ONNX function {self.expr}")
+            evaluate_onnx = (
+                self.onnx_call.evaluate_torch
+                if array_format == FORMAT_TORCH
+                else self.onnx_call.evaluate
+            )
+            return evaluate_onnx(
+                # parameters get overridden by args
+                {**base_parameters, **args},
+                func_params,
+                verbose,
+            )
+
+        if array_format == FORMAT_TORCH and self.python_function is not None:
+            import modeci_mdf.functions.torch as torch_ops
+
+            torch_function = torch_ops.standard_functions.get(self.name)
+            if torch_function is not None:
+                try:
+                    return torch_function(
+                        **{
+                            arg: torch_ops.to_tensor(func_params[arg])
+                            for arg in self.arguments
+                        }
+                    )
+                except Exception:
+                    # Leave it to the expression evaluation, as for the numpy functions
+                    pass
+
+        if self.actr_function is not None:
+            return self.actr_function(*[func_params[arg] for arg in args])
+
+        if self.python_function is not None and array_format == FORMAT_NUMPY:
+            kwargs = {arg: func_params[arg] for arg in self.arguments}
+
+            signature = None
+            if self.reuse_buffer:
+                signature = tuple(_get_value_signature(v) for v in kwargs.values())
+                if None in signature:
+                    signature = None
+                elif self.buffer is not None and signature == self.buffer_signature:
+                    try:
+                        return self.python_function(**kwargs, out=self.buffer)
+                    except Exception:
+                        pass
+
+            try:
+                value = self.python_function(**kwargs)
+            except Exception:
+                # Leave it to the expression evaluation to report the error
+                pass
+            else:
+                if (
+                    signature is not None
+                    and isinstance(value, np.ndarray)
+                    and value.ndim > 0
+                    and not any(value is v for v in kwargs.values())
+                ):
+                    self.buffer = value
+                    self.buffer_signature = signature
+                # Scalars are returned as Python numbers, as when the expression is evaluated
+                if isinstance(value, np.generic):
+                    value = value.item()
+                # As modelspec does for evaluated expressions
+                if type(value) == float and value.is_integer():
+                    value = int(value)
+                return value
+
+        return evaluate_expr(
+            self.expr, func_params, verbose=verbose, array_format=array_format
+        )
+
+
 class EvaluableFunction:
     """Evaluates a :class:`~modeci_mdf.mdf.Function` value during MDF graph execution.
 
     Args:
         function: :func:`~modeci_mdf.mdf.Function` to be evaluated e.g. mdf standard function
         verbose: If set to True Provides in-depth information else verbose message is not displayed
+        compiled: If set to True, string expressions are compiled once and reused on every evaluation
+        dtype: If set, floating point array values are cast to this dtype, see :class:`EvaluableGraph`
     """
 
-    def __init__(self, function: Function = False, verbose: Optional[bool] = False):
+    def __init__(
+        self,
+        function: Function = False,
+        verbose: Optional[bool] = False,
+        compiled: Optional[bool] = False,
+        dtype: Optional[np.dtype] = None,
+    ):
         self.verbose = verbose
         self.function = function
+        self.dtype = dtype
+        self._evaluate_expr = evaluate_compiled_expr if compiled else evaluate_expr
+
+        # The first of the functions which is known, and the expressions for its args
+        name = None
+        self._arg_exprs = []
+        for f in self.function.function or {}:
+            if f in mdf_functions:
+                name = f
+                self._arg_exprs = list(self.function.function[f].items())
+                break
+        self._call = _FunctionCall(name, self.function.value, dtype)
+
+        # Args which only depend on constants, see set_constants
+        self.constant_args = set()
+        self._constant_arg_values = {}
+
+        if compiled:
+            _precompile_exprs(self.function.value, *(self.function.args or {}).values())
+            if self.function.function:
+                for args in self.function.function.values():
+                    if isinstance(args, dict):
+                        _precompile_exprs(*args.values())
+
+    def set_constants(self, constant_ids: Set[str]):
+        """
+        Set the ids of the parameters of the node whose values never change. Args only depending on these are
+        evaluated once, and their values reused.
+
+        Args:
+            constant_ids: The ids of the constant parameters
+        """
+        self.constant_args = _get_constant_args(self._arg_exprs, constant_ids)
+        self._constant_arg_values = {}
 
     def evaluate(
         self,
@@ -296,81 +737,42 @@ class EvaluableFunction:
 
         """
 
-        expr = None
-
-        # print("functions value and function>>>", self.function.value, self.function.function)
-
-        # func_val  = self.function.value
-
-        if self.function.function:
-
-            for f in mdf_functions:
-
-                if f in self.function.function.keys():
-
-                    expr = create_python_expression(
-                        mdf_functions[f]["expression_string"]
-                    )
-
-                    break
-
-        if expr is None:
-            expr = self.function.value
-        #     #raise "Unknown function: {}. Known functions: {}".format(
-        #     #    self.function.function,
-        #     #    mdf_functions.keys,
-        #     #)
-
         func_params = {}
         func_params.update(parameters)
         if self.verbose:
             print(
                 "    Evaluating %s with %s, i.e. [%s]"
-                % (self.function, _params_info(func_params), expr)
+                % (self.function, _params_info(func_params), self._call.expr)
             )
-        if self.function.function:
-
-            for f in mdf_functions:
-
-                if f in self.function.function.keys():
-
-                    for arg in self.function.function[f].keys():
-
-                        func_params[arg] = evaluate_expr(
-                            self.function.function[f][arg],
-                            func_params,
-                            verbose=False,
-                            array_format=array_format,
-                        )
-                        if self.verbose:
-                            print(
-                                "      Arg: {} became: {}".format(
-                                    arg, _val_info(func_params[arg])
-                                )
-                            )
-                    break
-
-        # If this is an ONNX operation, evaluate it without modelspec.
-
-        if "onnx_ops." in expr:
+        for arg, arg_expr in self._arg_exprs:
+            key = (arg, array_format)
+            if key in self._constant_arg_values:
+                func_params[arg] = self._constant_arg_values[key]
+            else:
+                func_params[arg] = self._evaluate_expr(
+                    arg_expr,
+                    func_params,
+                    verbose=False,
+                    array_format=array_format,
+                )
+                if arg in self.constant_args:
+                    self._constant_arg_values[key] = func_params[arg]
             if self.verbose:
-                print(f"{self.function.id} is evaluating ONNX function {expr}")
-            self.curr_value = evaluate_onnx_expr(
-                expr,
-                # parameters get overridden by self.function.args
-                {**parameters, **self.function.args},
+                print(
+                    "      Arg: {} became: {}".format(arg, _val_info(func_params[arg]))
+                )
+
+        self.curr_value = _cast_floats(
+            self._call.evaluate(
+                self._evaluate_expr,
+                parameters,
                 func_params,
+                self.function.args,
+                array_format,
                 self.verbose,
-            )
-        elif "actr." in expr:
-            actr_function = getattr(actr_funcs, expr.split("(")[0].split(".")[-1])
-            self.curr_value = actr_function(
-                *[func_params[arg] for arg in self.function.args]
-            )
-        else:
-            self.curr_value = evaluate_expr(
-                expr, func_params, verbose=self.verbose, array_format=array_format
-            )
+            ),
+            self.dtype,
+        )
 
         if self.verbose:
             print(
@@ -387,14 +789,53 @@ class EvaluableParameter:
     Args:
         parameter: The parameter to evaluate during execution.
         verbose: Whether to print output of parameter calculations.
+        compiled: If set to True, string expressions are compiled once and reused on every evaluation
+        dtype: If set, floating point array values are cast to this dtype, see :class:`EvaluableGraph`
     """
 
     DEFAULT_INIT_VALUE = 0  # Temporary!
 
-    def __init__(self, parameter: Parameter, verbose: bool = False):
+    def __init__(
+        self,
+        parameter: Parameter,
+        verbose: bool = False,
+        compiled: bool = False,
+        dtype: Optional[np.dtype] = None,
+    ):
         self.verbose = verbose
         self.parameter = parameter
+        self.dtype = dtype
+        self._evaluate_expr = evaluate_compiled_expr if compiled else evaluate_expr
+
+        #: The value (or expression) of the parameter. This starts as the :code:`value` of the
+        #: :class:`~modeci_mdf.mdf.Parameter`, and can be overridden with :func:`set_value` without changing it.
+        self.value = self.parameter.value
+        # Incremented whenever the value is set, see EvaluableGraph's incremental option
+        self.version = 0
+
+        self._call = None
+        if self.parameter.function:
+            self._call = _FunctionCall(
+                self.parameter.function, self.parameter.function, dtype
+            )
+
+        if compiled:
+            _precompile_exprs(
+                self.parameter.value,
+                self.parameter.time_derivative,
+                *(self.parameter.args or {}).values(),
+            )
+
+        self.initialize()
+
+        # Whether the value never changes, and the array format it was evaluated with, see set_constants
+        self.constant = False
+        self._constant_format = None
+        self.constant_args = set()
+        self._constant_arg_values = {}
 
+    def initialize(self):
+        """Set the current value back to the :code:`default_initial_value` of the parameter, or to None if it has none"""
         if self.parameter.default_initial_value is not None:
             if is_number(self.parameter.default_initial_value):
 
@@ -409,9 +850,57 @@ class EvaluableParameter:
                 # evaluate_expr raises Exception
                 except Exception:
                     self.curr_value = self.parameter.default_initial_value
+            self.curr_value = _cast_floats(self.curr_value, self.dtype)
         else:
             self.curr_value = None
 
+        # The time derivative at the last evaluation, used by the integrators in modeci_mdf.integrators
+        self.curr_time_derivative = None
+
+    def is_stateful(self) -> bool:
+        """Is the parameter stateful? See :func:`~modeci_mdf.mdf.Parameter.is_stateful`, which this checks for the
+        current :attr:`value`"""
+        if (
+            self.parameter.time_derivative is not None
+            or self.parameter.default_initial_value is not None
+        ):
+            return True
+        if self.value is not None and type(self.value) == str:
+            return self.parameter.id in get_expression_symbols(self.value)
+        return False
+
+    def set_value(self, value: Any):
+        """
+        Set a new value (or expression) for the parameter, which is used from the next evaluation on. The
+        :class:`~modeci_mdf.mdf.Parameter` itself is left unchanged.
+
+        Args:
+            value: The new value, or expression for it
+        """
+        self.value = value
+
+        # The new value is also used by functions in the next evaluation, rather than the previous value of the
+        # parameter, unless it is stateful
+        if not self.is_stateful():
+            self.curr_value = None
+        self.version += 1
+
+    def set_constants(self, constant_ids: Set[str]):
+        """
+        Set the ids of the parameters of the node whose values never change. If this is one of them, it is only
+        evaluated once, as are any args of its function only depending on these.
+
+        Args:
+            constant_ids: The ids of the constant parameters
+        """
+        self.constant = self.parameter.id in constant_ids
+        self._constant_format = None
+        if self.parameter.function:
+            self.constant_args = _get_constant_args(
+                (self.parameter.args or {}).items(), constant_ids
+            )
+        self._constant_arg_values = {}
+
     def get_current_value(
         self, parameters: Dict[str, Any], array_format: str = FORMAT_DEFAULT
     ) -> Any:
@@ -430,8 +919,8 @@ class EvaluableParameter:
         # FIXME: Shouldn't this just call self.evaluate, seems like there is redundant code here?
         if self.curr_value is None:
 
-            if self.parameter.value is not None:
-                if self.parameter.is_stateful():
+            if self.value is not None:
+                if self.is_stateful():
 
                     if self.parameter.default_initial_value is not None:
                         return self.parameter.default_initial_value
@@ -441,11 +930,14 @@ class EvaluableParameter:
                     ips = {}
                     ips.update(parameters)
                     ips[self.parameter.id] = self.DEFAULT_INIT_VALUE
-                    self.curr_value = evaluate_expr(
-                        self.parameter.value,
-                        ips,
-                        verbose=False,
-                        array_format=array_format,
+                    self.curr_value = _cast_floats(
+                        self._evaluate_expr(
+                            self.value,
+                            ips,
+                            verbose=False,
+                            array_format=array_format,
+                        ),
+                        self.dtype,
                     )
                     if self.verbose:
                         print(
@@ -482,43 +974,41 @@ class EvaluableParameter:
                 )
             )
 
-        if self.parameter.value is not None:
+        if self.value is not None:
 
-            self.curr_value = evaluate_expr(
-                self.parameter.value,
-                parameters,
-                verbose=False,
-                array_format=array_format,
-            )
+            if not self.constant or self._constant_format != array_format:
+                self.curr_value = _cast_floats(
+                    self._evaluate_expr(
+                        self.value,
+                        parameters,
+                        verbose=False,
+                        array_format=array_format,
+                    ),
+                    self.dtype,
+                )
+                if self.constant:
+                    self._constant_format = array_format
         elif self.parameter.function:
-            expr = None
-            for f in mdf_functions:
-                if self.parameter.function == f:
-                    expr = create_python_expression(
-                        mdf_functions[f]["expression_string"]
-                    )
-            if not expr:
-
-                expr = self.parameter.function
-                # raise "Unknown function: {}. Known functions: {}".format(
-                #    self.parameter.function,
-                #    mdf_functions.keys,
-                # )
-
             func_params = {}
             func_params.update(parameters)
             if self.verbose:
                 print(
                     "    Evaluating %s with %s, i.e. [%s]"
-                    % (self.parameter, _params_info(func_params), expr)
-                )
-            for arg in self.parameter.args:
-                func_params[arg] = evaluate_expr(
-                    self.parameter.args[arg],
-                    func_params,
-                    verbose=False,
-                    array_format=array_format,
+                    % (self.parameter, _params_info(func_params), self._call.expr)
                 )
+            for arg, arg_expr in self.parameter.args.items():
+                key = (arg, array_format)
+                if key in self._constant_arg_values:
+                    func_params[arg] = self._constant_arg_values[key]
+                else:
+                    func_params[arg] = self._evaluate_expr(
+                        arg_expr,
+                        func_params,
+                        verbose=False,
+                        array_format=array_format,
+                    )
+                    if arg in self.constant_args:
+                        self._constant_arg_values[key] = func_params[arg]
                 if self.verbose:
                     print(
                         "      Arg: {} became: {}".format(
@@ -526,30 +1016,21 @@ class EvaluableParameter:
                         )
                     )
 
-            # If this is an ONNX operation, evaluate it without modelspec.
-            if "onnx_ops." in expr:
-                if self.verbose:
-                    print(f"{self.parameter.id} is evaluating ONNX function {expr}")
-                self.curr_value = evaluate_onnx_expr(
-                    expr,
-                    # parameters get overridden by self.parameter.args
-                    {**parameters, **self.parameter.args},
+            self.curr_value = _cast_floats(
+                self._call.evaluate(
+                    self._evaluate_expr,
+                    parameters,
                     func_params,
+                    self.parameter.args,
+                    array_format,
                     self.verbose,
-                )
-            elif "actr." in expr:
-                actr_function = getattr(actr_funcs, expr.split("(")[0].split(".")[-1])
-                self.curr_value = actr_function(
-                    *[func_params[arg] for arg in self.parameter.args]
-                )
-            else:
-                self.curr_value = evaluate_expr(
-                    expr, func_params, verbose=self.verbose, array_format=array_format
-                )
+                ),
+                self.dtype,
+            )
         else:
             if time_increment == None:
 
-                self.curr_value = evaluate_expr(
+                self.curr_value = self._evaluate_expr(
                     self.parameter.default_initial_value,
                     parameters,
                     verbose=False,
@@ -557,12 +1038,13 @@ class EvaluableParameter:
                 )
 
             else:
-                td = evaluate_expr(
+                td = self._evaluate_expr(
                     self.parameter.time_derivative,
                     parameters,
                     verbose=False,
                     array_format=array_format,
                 )
+                self.curr_time_derivative = td
 
                 self.curr_value += td * time_increment
 
@@ -581,11 +1063,24 @@ class EvaluableOutput:
     Args:
         output_port: Attribute of a Node which exports information to the dependent Node object
         verbose: If set to True Provides in-depth information else verbose message is not displayed
+        compiled: If set to True, the value expression is compiled once and reused on every evaluation
+        dtype: If set, floating point array values are cast to this dtype, see :class:`EvaluableGraph`
     """
 
-    def __init__(self, output_port: OutputPort, verbose: Optional[bool] = False):
+    def __init__(
+        self,
+        output_port: OutputPort,
+        verbose: Optional[bool] = False,
+        compiled: Optional[bool] = False,
+        dtype: Optional[np.dtype] = None,
+    ):
         self.verbose = verbose
         self.output_port = output_port
+        self.dtype = dtype
+        self._evaluate_expr = evaluate_compiled_expr if compiled else evaluate_expr
+
+        if compiled:
+            _precompile_exprs(self.output_port.value)
 
     def evaluate(
         self,
@@ -607,8 +1102,14 @@ class EvaluableOutput:
                 "    Evaluating %s with %s "
                 % (self.output_port, _params_info(parameters))
             )
-        self.curr_value = evaluate_expr(
-            self.output_port.value, parameters, verbose=False, array_format=array_format
+        self.curr_value = _cast_floats(
+            self._evaluate_expr(
+                self.output_port.value,
+                parameters,
+                verbose=False,
+                array_format=array_format,
+            ),
+            self.dtype,
         )
 
         if self.verbose:
@@ -630,12 +1131,21 @@ class EvaluableInput:
         input_port: The :class:`~modeci_mdf.mdf.InputPort` is an attribute of a Node which imports information to the
             :class:`~modeci_mdf.mdf.Node`
         verbose: If set to True Provides in-depth information else verbose message is not displayed
+        dtype: If set, floating point array values are cast to this dtype, see :class:`EvaluableGraph`
     """
 
-    def __init__(self, input_port: InputPort, verbose: Optional[bool] = False):
+    def __init__(
+        self,
+        input_port: InputPort,
+        verbose: Optional[bool] = False,
+        dtype: Optional[np.dtype] = None,
+    ):
         self.verbose = verbose
         self.input_port = input_port
+        self.dtype = dtype
         self.curr_value = 0
+        # Incremented whenever a new value is set, see EvaluableGraph's incremental option
+        self.version = 0
 
     def set_input_value(self, value: Union[str, int, np.ndarray]):
         """Set a new value at input port
@@ -645,7 +1155,13 @@ class EvaluableInput:
         """
         if self.verbose:
             print(f"    Input value in {self.input_port.id} set to {_val_info(value)}")
-        self.curr_value = value
+        self.curr_value = _cast_floats(value, self.dtype)
+        self.version += 1
+
+    def initialize(self):
+        """Clear the value at the input port, setting it back to 0"""
+        self.curr_value = 0
+        self.version += 1
 
     def evaluate(
         self, parameters: Dict[str, Any] = None, array_format: str = FORMAT_DEFAULT
@@ -672,6 +1188,67 @@ class EvaluableInput:
         return self.curr_value
 
 
+def _get_required_vars(args: Optional[Dict[str, Any]], value: Any = None) -> List[str]:
+    """Get the variables needed to evaluate the (str) expressions in the values of **args** and in **value**"""
+    exprs = list(args.values()) if args else []
+    exprs.append(value)
+
+    return [v for e in exprs for v in get_expression_symbols(e)]
+
+
+def _is_constant_expr(expr: Any, constant_ids: Set[str]) -> bool:
+    """Is **expr** a literal, or an expression without function calls which only depends on **constant_ids**?"""
+    if type(expr) != str:
+        return True
+    return not expression_has_calls(expr) and all(
+        v in constant_ids for v in get_expression_symbols(expr)
+    )
+
+
+def _get_constant_parameter_ids(
+    evaluable_parameters: Iterable["EvaluableParameter"],
+) -> Set[str]:
+    """
+    Get the ids of the parameters of a node whose values never change: those which are not stateful and have a value
+    which is a literal, or an expression only depending on other such parameters
+    """
+    candidates = [
+        ep
+        for ep in evaluable_parameters
+        if ep.value is not None
+        and ep.parameter.function is None
+        and not ep.is_stateful()
+    ]
+    constant_ids = set()
+
+    changed = True
+    while changed:
+        changed = False
+        for ep in candidates:
+            if ep.parameter.id not in constant_ids and _is_constant_expr(
+                ep.value, constant_ids
+            ):
+                constant_ids.add(ep.parameter.id)
+                changed = True
+
+    return constant_ids
+
+
+def _get_constant_args(
+    arg_exprs: Iterable[Tuple[str, Any]], constant_ids: Set[str]
+) -> Set[str]:
+    """Get the names of the args of a function which only depend on constants (see :func:`_get_constant_parameter_ids`)"""
+    constant_args = set()
+    previous_args = set()
+    for arg, arg_expr in arg_exprs:
+        # Earlier args hide parameters with the same name
+        if _is_constant_expr(arg_expr, constant_ids - previous_args):
+            constant_args.add(arg)
+        previous_args.add(arg)
+
+    return constant_args
+
+
 class EvaluableNode:
     r"""Evaluates a :class:`~modeci_mdf.mdf.Node` during MDF graph execution.
 
@@ -679,11 +1256,22 @@ class EvaluableNode:
         node: A self contained unit of evaluation receiving input from other :class:`~modeci_mdf.mdf.Node`\(s) on
             :class:`~modeci_mdf.mdf.InputPort`\(s).
         verbose: If set to True Provides in-depth information else verbose message is not displayed
+        compiled: If set to True, the expressions of all parameters, functions and output ports are compiled once
+            at construction and reused on every evaluation
+        dtype: If set, floating point array values are cast to this dtype, see :class:`EvaluableGraph`
     """
 
-    def __init__(self, node: Node, verbose: Optional[bool] = False):
+    def __init__(
+        self,
+        node: Node,
+        verbose: Optional[bool] = False,
+        compiled: Optional[bool] = False,
+        dtype: Optional[np.dtype] = None,
+    ):
         self.verbose = verbose
         self.node = node
+        self.compiled = compiled
+        self.dtype = dtype
         self.evaluable_inputs = {}
         self.evaluable_parameters = OrderedDict()
         self.evaluable_functions = OrderedDict()
@@ -695,7 +1283,7 @@ class EvaluableNode:
         all_known_vars += KNOWN_PARAMETERS
 
         for ip in node.input_ports:
-            rip = EvaluableInput(ip, self.verbose)
+            rip = EvaluableInput(ip, self.verbose, self.dtype)
             self.evaluable_inputs[ip.id] = rip
             all_known_vars.append(ip.id)
             # params_init[ip] = ip.curr_value
@@ -720,30 +1308,7 @@ class EvaluableNode:
                     "    Checking whether function: %s with args %s is sufficiently determined by known vars %s"
                     % (f.id, f.args, all_known_vars)
                 )
-            all_req_vars = []
-            if f.args:
-                for arg in f.args:
-                    arg_expr = f.args[arg]
-
-                    # some non-expression/str types will crash in sympy.simplify
-                    if not isinstance(arg_expr, (sympy.Expr, str)):
-                        continue
-
-                    # If we are dealing with a list of symbols, each must treated separately
-                    if (
-                        type(arg_expr) == str
-                        and arg_expr[0] == "["
-                        and arg_expr[-1] == "]"
-                    ):
-                        # Use the Python interpreter to parse this into a List[str]
-                        arg_expr_list = parse_str_as_list(arg_expr)
-                    else:
-                        arg_expr_list = [arg_expr]
-
-                    for e in arg_expr_list:
-                        func_expr = sympy.simplify(e)
-                        all_req_vars.extend([str(s) for s in func_expr.free_symbols])
-
+            all_req_vars = _get_required_vars(f.args)
             all_present = [v in all_known_vars for v in all_req_vars]
 
             if verbose:
@@ -752,7 +1317,7 @@ class EvaluableNode:
                     % (all_req_vars, all_known_vars, all_present)
                 )
             if all(all_present):
-                rf = EvaluableFunction(f, self.verbose)
+                rf = EvaluableFunction(f, self.verbose, self.compiled, self.dtype)
                 self.evaluable_functions[f.id] = rf
                 all_known_vars.append(f.id)
             #     params_init[f] = self.evaluable_functions[f.id].evaluate(
@@ -779,37 +1344,7 @@ class EvaluableNode:
                     "    Checking whether parameter: %s with args: %s, value: %s (%s) is sufficiently determined by known vars %s"
                     % (p.id, p.args, p.value, type(p.value), all_known_vars)
                 )
-            all_req_vars = []
-
-            if p.value is not None and type(p.value) == str:
-                if p.value[0] == "[" and p.value[-1] == "]":
-                    # Use the Python interpreter to parse this into a List[str]
-                    arg_expr_list = parse_str_as_list(p.value)
-                else:
-                    arg_expr_list = [p.value]
-
-                for e in arg_expr_list:
-                    param_expr = sympy.simplify(e)
-                    all_req_vars.extend([str(s) for s in param_expr.free_symbols])
-
-            if p.args is not None:
-                for arg in p.args:
-                    arg_expr = p.args[arg]
-
-                    # If we are dealing with a list of symbols, each must treated separately
-                    if (
-                        type(arg_expr) == str
-                        and arg_expr[0] == "["
-                        and arg_expr[-1] == "]"
-                    ):
-                        # Use the Python interpreter to parse this into a List[str]
-                        arg_expr_list = parse_str_as_list(arg_expr)
-                    else:
-                        arg_expr_list = [arg_expr]
-
-                    for e in arg_expr_list:
-                        param_expr = sympy.simplify(e)
-                        all_req_vars.extend([str(s) for s in param_expr.free_symbols])
+            all_req_vars = _get_required_vars(p.args, p.value)
 
             all_known_vars_plus_this = all_known_vars + [p.id]
             all_present = [v in all_known_vars_plus_this for v in all_req_vars]
@@ -825,7 +1360,7 @@ class EvaluableNode:
                     )
                 )
             if all(all_present):
-                ep = EvaluableParameter(p, self.verbose)
+                ep = EvaluableParameter(p, self.verbose, self.compiled, self.dtype)
                 self.evaluable_parameters[p.id] = ep
                 all_known_vars.append(p.id)
 
@@ -839,11 +1374,63 @@ class EvaluableNode:
                     all_params_to_check.append(p)  # Add back to end of list...
 
         for op in node.output_ports:
-            rop = EvaluableOutput(op, self.verbose)
+            rop = EvaluableOutput(op, self.verbose, self.compiled, self.dtype)
             self.evaluable_outputs[op.id] = rop
 
+        self._set_constants()
+
+        # Incremented whenever the node is evaluated, see EvaluableGraph's incremental option
+        self.version = 0
+        self.evaluated_key = None
+
+    def _set_constants(self):
+        #: The ids of the parameters whose values never change, which are only evaluated once
+        self.constant_ids = _get_constant_parameter_ids(
+            self.evaluable_parameters.values()
+        )
+        for e in list(self.evaluable_functions.values()) + list(
+            self.evaluable_parameters.values()
+        ):
+            e.set_constants(self.constant_ids)
+
+        #: Whether any of the parameters of the node is stateful, i.e. its value depends on its previous values
+        self.is_stateful = any(
+            ep.is_stateful() for ep in self.evaluable_parameters.values()
+        )
+
+    def set_parameter_value(self, parameter_id: str, value: Any):
+        """
+        Set a new value for a parameter of the node, which is used from the next evaluation on, see
+        :func:`EvaluableParameter.set_value`. The :class:`~modeci_mdf.mdf.Parameter` itself is left unchanged.
+
+        Args:
+            parameter_id: The id of the parameter
+            value: The new value, or expression for it
+        """
+        self.evaluable_parameters[parameter_id].set_value(value)
+
+        # This may change which parameters are constant
+        self._set_constants()
+
+    def get_function_calls(self) -> Dict[str, _FunctionCall]:
+        """The calls made by the functions of the node, and parameters with functions, keyed by their ids"""
+        calls = {ef_id: ef._call for ef_id, ef in self.evaluable_functions.items()}
+        for ep_id, ep in self.evaluable_parameters.items():
+            if ep._call is not None:
+                calls[ep_id] = ep._call
+        return calls
+
     def initialize(self):
-        pass
+        """
+        Put the node back in the state it was created in: the values of stateful parameters are set back to their
+        :code:`default_initial_value`, those of other parameters are evaluated again from their expressions, and input
+        ports are cleared. The node is evaluated again on the next evaluation with EvaluableGraph's incremental option.
+        """
+        for eip in self.evaluable_inputs.values():
+            eip.initialize()
+        for ep in self.evaluable_parameters.values():
+            ep.initialize()
+        self.evaluated_key = None
 
     def evaluate(
         self,
@@ -900,6 +1487,87 @@ class EvaluableNode:
                 return self.evaluable_outputs[rop].curr_value
 
 
+def _allocate_record_buffer(value: Any, size: int) -> np.ndarray:
+    """Allocate an array to record **size** values like **value**. Numbers are recorded as (at least) float64, so
+    e.g. a state which starts at an integer value but is then integrated is not truncated."""
+    value = np.asarray(value)
+    if value.dtype.kind in "biuf":
+        dtype = np.result_type(value.dtype, np.float64)
+    else:
+        dtype = value.dtype
+
+    return np.empty((size,) + value.shape, dtype=dtype)
+
+
+class _EdgeTransfer:
+    """
+    An :class:`~modeci_mdf.mdf.Edge`, resolved once to the evaluable output port it sends from, the evaluable input
+    port it sends to and its weight (as a numpy array if it is given as a list).
+
+    Args:
+        edge: The edge
+        sender: The output port of the sender node
+        receiver: The input port of the receiver node
+        reuse_buffer: If True, weighted values are written in place into the array created for the previous transfer
+            along this edge, when the shape and dtype of the result are unchanged
+        dtype: If set, a floating point weight array is cast to this dtype, see :class:`EvaluableGraph`
+    """
+
+    def __init__(
+        self,
+        edge: Edge,
+        sender: EvaluableOutput,
+        receiver: EvaluableInput,
+        reuse_buffer: bool = False,
+        dtype: Optional[np.dtype] = None,
+    ):
+        self.edge = edge
+        self.sender = sender
+        self.receiver = receiver
+        self.reuse_buffer = reuse_buffer
+        self.buffer = None
+        # The version of the sender node at the last transfer, see EvaluableGraph's incremental option
+        self.sender_version = None
+
+        weight = (
+            1
+            if not edge.parameters or not "weight" in edge.parameters
+            else edge.parameters["weight"]
+        )
+        if type(weight) == list:
+            weight = _cast_floats(np.array(weight), dtype)
+        self.weight = weight
+        self.torch_weight = None
+        self.is_identity = type(weight) in (int, float) and weight == 1
+
+    def transfer(self, array_format: str = FORMAT_DEFAULT) -> Any:
+        """Set the value of the receiver port from the current value of the sender port, and return it"""
+        value = self.sender.curr_value
+
+        if self.is_identity:
+            input_value = value
+        elif (
+            self.buffer is not None
+            and isinstance(value, np.ndarray)
+            and np.broadcast(value, self.weight).shape == self.buffer.shape
+            and np.result_type(value, self.weight) == self.buffer.dtype
+        ):
+            input_value = np.multiply(value, self.weight, out=self.buffer)
+        elif array_format == FORMAT_TORCH:
+            import modeci_mdf.functions.torch as torch_ops
+
+            if self.torch_weight is None:
+                self.torch_weight = torch_ops.to_tensor(self.weight)
+            input_value = torch_ops.to_tensor(value) * self.torch_weight
+        else:
+            input_value = value * self.weight
+            if self.reuse_buffer and isinstance(input_value, np.ndarray):
+                self.buffer = input_value
+
+        self.receiver.set_input_value(input_value)
+        return input_value
+
+
 class EvaluableGraph:
     r"""
     Evaluates a :class:`~modeci_mdf.mdf.Graph` with the MDF execution engine. This is the top-level interface to the execution engine.
@@ -907,43 +1575,78 @@ class EvaluableGraph:
     Args:
         graph: A directed graph consisting of :class:`~modeci_mdf.mdf.Node`\(s) connected via :class:`~modeci_mdf.mdf.Edge`\(s)
         verbose: If set to True Provides in-depth information else verbose message is not displayed
+        compiled: If set to True, the expression strings of every node are compiled once at construction and the
+            resulting code objects are reused on every call to :func:`evaluate`, rather than being re-parsed at every
+            time step. Only used when evaluating with the numpy array format.
+        backend: Either :code:`'mdf'` (the default) to evaluate the graph node by node, or :code:`'onnx'` to lower a
+            graph composed entirely of ONNX functions (e.g. the output of
+            :func:`~modeci_mdf.interfaces.onnx.onnx_to_mdf`) to a single ONNX model, which :func:`evaluate` runs in
+            one onnxruntime session. Results are available on the evaluable nodes in both cases.
+        integrator: The integrator used to advance parameters with a :code:`time_derivative` on each time step, one of
+            :code:`'euler'` (the default), :code:`'rk4'` or :code:`'rk45'`, or an
+            :class:`~modeci_mdf.integrators.Integrator`. Integrators other than Euler advance all such parameters in
+            the graph together, and cannot be used with graphs that have conditions.
+        reuse_buffers: If set to True, the arrays passed along weighted edges and the array results of the standard
+            MDF functions are reused from one evaluation to the next and overwritten in place, rather than allocated
+            anew. Buffers are preallocated from the shapes and dtypes found by :func:`infer_shapes` where possible,
+            and otherwise kept from the first evaluation. Values taken from input and output ports must then be copied
+            if they are to be kept.
+        incremental: If set to True, a node without stateful parameters is only evaluated again if one of its inputs
+            (set by an edge from a node which was evaluated again, or with :code:`initializer`) or parameters (set with
+            :func:`set_parameter_value`) has been set since its last evaluation. Nodes are assumed to be
+            deterministic. Only used for graphs with a :attr:`static_schedule`.
+        dtype: If set (e.g. to :code:`numpy.float32`), all floating point arrays in the graph (parameter values,
+            inputs, edge weights and the results of functions and output ports) are cast to this dtype, and ONNX
+            functions are run with it. Python floats are left as they are, as they do not change the dtype of the
+            arrays they are combined with. By default, the dtypes the values are evaluated with are kept, apart from
+            the float32 results of ONNX functions, which are cast to float64.
+        profile: If set to True, calls, wall time, expression evaluations, ONNX operator runs and the size of the
+            arrays produced are recorded for every node, parameter, function, output port and edge in the
+            :attr:`profiler` (see :class:`~modeci_mdf.profiling.Profiler`). Without this, nothing is recorded and
+            evaluation is not slowed down at all.
+        threads: If set, the nodes of each pass of the scheduler (or of :attr:`static_passes`), which do not depend on
+            each other, are evaluated concurrently on a pool of this many threads, with the edges into them
+            transferred just before. Each pass is finished before the next one starts. This speeds up wide graphs whose
+            nodes spend their time in code which releases the GIL, e.g. onnxruntime or large numpy operations. Passes
+            with an edge between two of their nodes (which can only happen in cycles) are evaluated one node at a time.
+            The threads are stopped by :func:`close`.
 
     """
 
-    def __init__(self, graph: Graph, verbose: Optional[bool] = False):
+    def __init__(
+        self,
+        graph: Graph,
+        verbose: Optional[bool] = False,
+        compiled: Optional[bool] = False,
+        backend: str = BACKEND_MDF,
+        integrator: Union[str, Integrator] = "euler",
+        reuse_buffers: bool = False,
+        incremental: bool = False,
+        dtype: Optional[Union[str, type, np.dtype]] = None,
+        profile: bool = False,
+        threads: Optional[int] = None,
+    ):
         self.verbose = verbose
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        self.incremental = incremental
+        self.compiled = compiled
+        self.backend = backend
+        self.integrator = get_integrator(integrator)
         print("\nInit graph: %s" % graph.id)
         self.graph = graph
         self.enodes = {}
-        self.root_nodes = []
 
         for node in graph.nodes:
             if self.verbose:
                 print("\n  Init node: %s" % node.id)
-            en = EvaluableNode(node, self.verbose)
+            en = EvaluableNode(node, self.verbose, self.compiled, self.dtype)
             self.enodes[node.id] = en
-            self.root_nodes.append(node.id)
 
-        for edge in graph.edges:
-            if (
-                edge.receiver in self.root_nodes
-            ):  # It could have been already removed...
-                self.root_nodes.remove(edge.receiver)
+        receivers = {edge.receiver for edge in graph.edges}
+        self.root_nodes = [node.id for node in graph.nodes if node.id not in receivers]
 
-        self.ordered_edges = []
-        evaluated_nodes = []
-        for rn in self.root_nodes:
-            evaluated_nodes.append(rn)
-
-        edges_to_eval = [edge for edge in self.graph.edges]
-
-        while len(edges_to_eval) > 0:
-            edge = edges_to_eval.pop(0)
-            if edge.sender not in evaluated_nodes:
-                edges_to_eval.append(edge)  # Add back to end of list...
-            else:
-                self.ordered_edges.append(edge)
-                evaluated_nodes.append(edge.receiver)
+        # Cycles are allowed here, the execution order is determined by the scheduler
+        self.ordered_edges = self.graph.get_ordered_edges(allow_cycles=True)
 
         if self.graph.conditions is not None:
             conditions = {
@@ -959,12 +1662,144 @@ class EvaluableGraph:
             conditions = {}
             termination_conds = {}
 
-        self.scheduler = graph_scheduler.Scheduler(
+        # Kept to create a new scheduler in reset
+        self._conditions = conditions
+        self._termination_conds = termination_conds
+        self.scheduler = self._create_scheduler()
+
+        # The edges into each node, in the order they appear in the graph, resolved to the ports they connect
+        self.edge_transfers = {}
+        self.incoming_edges = {node.id: [] for node in self.graph.nodes}
+        for edge in self.graph.edges:
+            transfer = _EdgeTransfer(
+                edge,
+                self.enodes[edge.sender].evaluable_outputs[edge.sender_port],
+                self.enodes[edge.receiver].evaluable_inputs[edge.receiver_port],
+                reuse_buffers,
+                self.dtype,
+            )
+            self.edge_transfers[id(edge)] = transfer
+            self.incoming_edges[edge.receiver].append(transfer)
+
+        if reuse_buffers:
+            for en in self.enodes.values():
+                for call in en.get_function_calls().values():
+                    call.reuse_buffer = call.supports_out
+            self._preallocate_buffers()
+
+        #: Without conditions every node is evaluated once, after the senders of its incoming edges. Unless there are
+        #: cycles, the order of the node ids to evaluate is worked out here once, and :func:`evaluate_nodes` runs
+        #: through it without the scheduler. None if the scheduler is needed.
+        self.static_schedule = None
+        if not conditions and not termination_conds:
+            try:
+                self.static_schedule = [n.id for n in self.graph.get_ordered_nodes()]
+            except ValueError:
+                pass
+
+        #: The node ids of :attr:`static_schedule`, grouped into passes. The nodes in each pass only depend on nodes in
+        #: earlier passes, so they can be evaluated concurrently. None if the scheduler is needed.
+        self.static_passes = None
+        if self.static_schedule is not None:
+            self.static_passes = self._get_static_passes()
+
+        self._executor = None
+        if threads is not None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=threads, thread_name_prefix="mdf-%s" % self.graph.id
+            )
+
+        # Conditions may depend on how many times nodes have run, which the intermediate evaluations of the other
+        # integrators would change
+        if (conditions or termination_conds) and not isinstance(
+            self.integrator, EulerIntegrator
+        ):
+            raise NotImplementedError(
+                "Graph %s has conditions, which are only supported with the Euler integrator"
+                % self.graph.id
+            )
+
+        if self.backend == BACKEND_ONNX:
+            from modeci_mdf.interfaces.onnx.backend import OnnxGraphBackend
+
+            self.onnx_backend = OnnxGraphBackend(self.graph, dtype=self.dtype)
+        elif self.backend != BACKEND_MDF:
+            raise ValueError(
+                "Unknown backend: %s, use one of %s"
+                % (self.backend, [BACKEND_MDF, BACKEND_ONNX])
+            )
+
+        #: The :class:`~modeci_mdf.profiling.Profiler` recording the evaluation of the graph, None unless profile is set
+        self.profiler = None
+        if profile:
+            from modeci_mdf.profiling import Profiler
+
+            self.profiler = Profiler()
+            self.profiler.instrument(self)
+
+    def close(self):
+        """
+        Shut down the pool of threads created with :code:`threads`, waiting for any running evaluation to finish.
+        The graph can still be evaluated afterwards, one node at a time. This is also called on leaving a
+        :code:`with` block, e.g. :code:`with EvaluableGraph(graph, threads=4) as egraph:`.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "EvaluableGraph":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _create_scheduler(self) -> graph_scheduler.Scheduler:
+        """Create a scheduler for the graph, at time 0 with no nodes run"""
+        # The scheduler may add entries to the dicts it is given
+        return graph_scheduler.Scheduler(
             graph=self.graph.dependency_dict,
-            conditions=conditions,
-            termination_conds=termination_conds,
+            conditions=dict(self._conditions),
+            termination_conds=dict(self._termination_conds),
         )
 
+    def _get_static_passes(self) -> List[List[str]]:
+        """Group the nodes of :attr:`static_schedule` into passes, each node one pass after the last of its senders"""
+        passes = []
+        pass_index = {}
+        for node_id in self.static_schedule:
+            index = max(
+                (pass_index[t.edge.sender] + 1 for t in self.incoming_edges[node_id]),
+                default=0,
+            )
+            pass_index[node_id] = index
+            if index == len(passes):
+                passes.append([])
+            passes[index].append(node_id)
+        return passes
+
+    def _preallocate_buffers(self):
+        """Allocate the buffers for reuse_buffers, with the shapes and dtypes from an evaluation on placeholder values"""
+        try:
+            placeholder = _evaluate_placeholders(self.graph, dtype=self.dtype)
+        except Exception as e:
+            # The buffers are then kept from the first evaluation
+            if self.verbose:
+                print("  Not preallocating buffers, as evaluation failed: %s" % e)
+            return
+
+        for node_id, en in self.enodes.items():
+            placeholder_calls = placeholder.enodes[node_id].get_function_calls()
+            for call_id, call in en.get_function_calls().items():
+                buffer = placeholder_calls[call_id].buffer
+                if call.reuse_buffer and buffer is not None:
+                    call.buffer = np.empty_like(buffer)
+                    call.buffer_signature = placeholder_calls[call_id].buffer_signature
+
+        for edge_id, transfer in self.edge_transfers.items():
+            buffer = placeholder.edge_transfers[edge_id].buffer
+            if buffer is not None:
+                transfer.buffer = np.empty_like(buffer)
+
     def evaluate(
         self,
         time_increment: Union[int, float] = None,
@@ -976,12 +1811,19 @@ class EvaluableGraph:
 
         Args:
             time_increment: Time step for next execution
-            array_format: A n-dimensional array
+            array_format: A n-dimensional array. With :code:`'torch'`, values are evaluated as PyTorch tensors, with
+                the standard functions and ONNX operators in :mod:`~modeci_mdf.functions.torch` where available, so
+                that they run on torch's own thread pool (see :code:`torch.set_num_threads`).
             initializer: sets the initial value of parameters of the node
 
         """
         # Any values that are set via the passed in initalizer, set their values. This lets us avoid creating
         # dummy input nodes with parameters for evaluating the graph
+        if initializer and array_format == FORMAT_TORCH:
+            import modeci_mdf.functions.torch as torch_ops
+
+            initializer = {k: torch_ops.to_tensor(v) for k, v in initializer.items()}
+
         for en_id, en in self.enodes.items():
             for inp_name, inp in en.evaluable_inputs.items():
                 if initializer and inp_name in initializer:
@@ -1007,9 +1849,47 @@ class EvaluableGraph:
             print(" node-based conditions\n  %s" % str_conds_nb)
             print(" termination conditions\n  %s" % str_conds_term)
 
-        incoming_edges = {n: set() for n in self.graph.nodes}
-        for edge in self.graph.edges:
-            incoming_edges[self.graph.get_node(edge.receiver)].add(edge)
+        if self.backend == BACKEND_ONNX:
+            self.evaluate_onnx()
+            return
+
+        if time_increment is None:
+            self.evaluate_nodes(array_format=array_format)
+        else:
+            self.integrator.step(self, time_increment, array_format)
+
+        if self.verbose:
+            print("Trial terminated")
+
+    def evaluate_nodes(
+        self,
+        time_increment: Union[int, float] = None,
+        array_format: str = FORMAT_DEFAULT,
+    ):
+        """
+        Evaluates every node of the graph once, in the order determined by the scheduler (or by
+        :attr:`static_schedule` for graphs without conditions), advancing parameters with a :code:`time_derivative` by
+        forward Euler. This is called by :func:`evaluate`, via the integrator for time steps.
+
+        Args:
+            time_increment: Time step for next execution
+            array_format: A n-dimensional array
+        """
+        if self.static_schedule is not None:
+            evaluate_node = (
+                self._evaluate_node_incremental
+                if self.incremental
+                else self._evaluate_node
+            )
+            if self._executor is None:
+                for node_id in self.static_schedule:
+                    evaluate_node(node_id, time_increment, array_format)
+            else:
+                for node_ids in self.static_passes:
+                    self._evaluate_pass(
+                        node_ids, evaluate_node, time_increment, array_format
+                    )
+            return
 
         for ts in self.scheduler.run():
             if self.verbose:
@@ -1017,17 +1897,349 @@ class EvaluableGraph:
                     "> Evaluating time step: %s"
                     % self.scheduler.get_clock(None).simple_time
                 )
-            for node in ts:
-                for edge in incoming_edges[node]:
-                    self.evaluate_edge(
-                        edge, time_increment=time_increment, array_format=array_format
-                    )
-                self.enodes[node.id].evaluate(
-                    time_increment=time_increment, array_format=array_format
+            node_ids = [node.id for node in ts]
+            if self._executor is not None and not any(
+                transfer.edge.sender in node_ids
+                for node_id in node_ids
+                for transfer in self.incoming_edges[node_id]
+            ):
+                self._evaluate_pass(
+                    node_ids, self._evaluate_node, time_increment, array_format
                 )
+            else:
+                for node_id in node_ids:
+                    self._evaluate_node(node_id, time_increment, array_format)
+
+    def _evaluate_pass(
+        self,
+        node_ids: List[str],
+        evaluate_node: Callable[[str, Union[int, float], str], None],
+        time_increment: Union[int, float],
+        array_format: str,
+    ):
+        """Evaluate nodes which do not depend on each other concurrently on the thread pool, and wait for all of them"""
+        if len(node_ids) == 1:
+            evaluate_node(node_ids[0], time_increment, array_format)
+            return
+
+        futures = [
+            self._executor.submit(evaluate_node, node_id, time_increment, array_format)
+            for node_id in node_ids
+        ]
+        concurrent.futures.wait(futures)
+        for future in futures:
+            # Raises the exception of the first node that failed, if any
+            future.result()
+
+    def _evaluate_node(
+        self, node_id: str, time_increment: Union[int, float], array_format: str
+    ):
+        """Set the inputs of a node from the edges into it, and evaluate it"""
+        for transfer in self.incoming_edges[node_id]:
+            self._evaluate_transfer(transfer, array_format)
+        self.enodes[node_id].evaluate(
+            time_increment=time_increment, array_format=array_format
+        )
+
+    def _evaluate_node_incremental(
+        self, node_id: str, time_increment: Union[int, float], array_format: str
+    ):
+        """Evaluate a node in :attr:`static_schedule` if it is stateful, or has had an input or parameter set"""
+        for transfer in self.incoming_edges[node_id]:
+            sender_version = self.enodes[transfer.edge.sender].version
+            if transfer.sender_version != sender_version:
+                self._evaluate_transfer(transfer, array_format)
+                transfer.sender_version = sender_version
+
+        en = self.enodes[node_id]
+        key = (
+            tuple(eip.version for eip in en.evaluable_inputs.values()),
+            tuple(ep.version for ep in en.evaluable_parameters.values()),
+            array_format,
+        )
+        if en.is_stateful or key != en.evaluated_key:
+            en.evaluate(time_increment=time_increment, array_format=array_format)
+            en.evaluated_key = key
+            en.version += 1
+        elif self.verbose:
+            print("  Node %s is unchanged, not evaluating" % node_id)
+
+    def reset(self):
+        """
+        Restart the simulation of the graph from its initial conditions, without building it again: every node is
+        initialized (see :func:`EvaluableNode.initialize`), the scheduler is set back to time 0 with no nodes run, and
+        any state kept by the :attr:`integrator` is cleared. Parameter values set with :func:`set_parameter_value` are
+        kept, as are the counters of the :attr:`profiler` (see :func:`~modeci_mdf.profiling.Profiler.reset`).
+        """
+        for en in self.enodes.values():
+            en.initialize()
+        for transfer in self.edge_transfers.values():
+            transfer.sender_version = None
+
+        # A new scheduler, from the conditions parsed when the graph was created
+        self.scheduler = self._create_scheduler()
+
+        self.integrator.reset()
+
+    def set_parameter_value(self, node_id: str, parameter_id: str, value: Any):
+        """
+        Set a new value for a parameter, see :func:`EvaluableNode.set_parameter_value`.
+
+        Args:
+            node_id: The id of the node
+            parameter_id: The id of the parameter
+            value: The new value, or expression for it
+        """
+        self.enodes[node_id].set_parameter_value(parameter_id, value)
+
+    def evaluate_onnx(self):
+        """
+        Evaluates the graph as a single fused ONNX model (see :code:`backend`), and stores the results on the
+        evaluable inputs, functions and outputs of each node, as :func:`evaluate` does for the reference backend.
+        """
+        results = self.onnx_backend.run(
+            {
+                (node_id, ip_id): self.enodes[node_id]
+                .evaluable_inputs[ip_id]
+                .curr_value
+                for node_id, ip_id in self.onnx_backend.graph_inputs
+            }
+        )
+
+        for (node_id, op_id), value in results.items():
+            self.enodes[node_id].evaluable_outputs[op_id].curr_value = value
+
+        for edge in self.graph.edges:
+            self.enodes[edge.receiver].evaluable_inputs[
+                edge.receiver_port
+            ].curr_value = results[(edge.sender, edge.sender_port)]
+
+        for node_id, en in self.enodes.items():
+            values = [eop.curr_value for eop in en.evaluable_outputs.values()]
+            for ep in en.evaluable_parameters.values():
+                if ep.parameter.function is not None:
+                    ep.curr_value = values[0] if len(values) == 1 else tuple(values)
+                elif ep.value is not None:
+                    ep.curr_value = ep.value
 
         if self.verbose:
-            print("Trial terminated")
+            print("Evaluated graph %s with ONNX backend" % self.graph.id)
+
+    def evaluate_batch(
+        self,
+        initializer_batch: Dict[str, Any],
+        time_increment: Union[int, float] = None,
+        array_format: str = FORMAT_DEFAULT,
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Evaluates a :class:`~modeci_mdf.mdf.Graph` over a batch of input samples in a single pass.
+
+        Every value in **initializer_batch** has a leading batch axis, which is propagated through the node functions
+        and edge weights using NumPy broadcasting, so the functions used in the graph must accept arrays. Output ports
+        of nodes that do not depend on any of the graph inputs are broadcast along the batch axis, while those of nodes that
+        do must keep it as their leading dimension, so a ValueError is raised for functions that reduce over it.
+
+        Args:
+            initializer_batch: Values for the graph inputs (see :attr:`~modeci_mdf.mdf.Graph.inputs`), keyed by input
+                port id as for the **initializer** of :func:`evaluate`, each with a leading batch axis
+            time_increment: Time step for next execution
+            array_format: A n-dimensional array
+
+        Returns:
+            A dict keyed by node id of dicts keyed by output port id, holding the stacked output values of the batch
+        """
+        graph_inputs = {ip_id for node_id, ip_id in self.graph.inputs}
+
+        unknown = [ip_id for ip_id in initializer_batch if ip_id not in graph_inputs]
+        if len(unknown) > 0:
+            raise ValueError(
+                "Values given for %s, which are not inputs of graph %s: %s"
+                % (unknown, self.graph.id, sorted(graph_inputs))
+            )
+
+        batch = {ip_id: np.asarray(v) for ip_id, v in initializer_batch.items()}
+        batch_sizes = {v.shape[0] if v.ndim > 0 else None for v in batch.values()}
+        if len(batch_sizes) != 1 or None in batch_sizes:
+            raise ValueError(
+                "All inputs in a batch need the same leading batch dimension, got shapes: %s"
+                % {ip_id: v.shape for ip_id, v in batch.items()}
+            )
+        batch_size = batch_sizes.pop()
+
+        self.evaluate(
+            time_increment=time_increment,
+            array_format=array_format,
+            initializer=batch,
+        )
+
+        # Nodes downstream of a graph input carry the batch axis
+        batched_nodes = {
+            node_id for node_id, ip_id in self.graph.inputs if ip_id in batch
+        }
+        edges_to_check = list(self.graph.edges)
+        while True:
+            new_nodes = {
+                e.receiver
+                for e in edges_to_check
+                if e.sender in batched_nodes and e.receiver not in batched_nodes
+            }
+            if len(new_nodes) == 0:
+                break
+            batched_nodes |= new_nodes
+
+        outputs = {}
+        for node_id, en in self.enodes.items():
+            outputs[node_id] = {}
+            for op_id, eop in en.evaluable_outputs.items():
+                value = np.asarray(eop.curr_value)
+                if node_id not in batched_nodes:
+                    value = np.broadcast_to(value, (batch_size,) + value.shape)
+                elif value.ndim == 0 or value.shape[0] != batch_size:
+                    raise ValueError(
+                        "Output port %s of node %s depends on the batched inputs, but its value of shape %s has no "
+                        "leading batch dimension of size %i; are the functions of the node reducing over the batch?"
+                        % (op_id, node_id, value.shape, batch_size)
+                    )
+                outputs[node_id][op_id] = value
+
+        return outputs
+
+    def run(
+        self,
+        duration: float,
+        dt: float,
+        record: Optional[List[Union[str, Tuple[str, str]]]] = None,
+        decimation: int = 1,
+        array_format: str = FORMAT_DEFAULT,
+        initializer: Optional[Dict[str, Any]] = None,
+        hdf5_group: Optional["h5py.Group"] = None,
+        chunk_size: int = RUN_CHUNK_SIZE,
+    ) -> Dict[str, Union[np.ndarray, "h5py.Dataset"]]:
+        """
+        Simulates the graph over time, from 0 to **duration** in steps of **dt**, recording the values of selected
+        parameters and ports. The graph is first evaluated without a time increment (initializing any stateful
+        parameters), then with a time increment of **dt** for every subsequent step.
+
+        Recorded values are stored into arrays allocated up front for the whole run, with a leading time axis, or
+        are written to HDF5 datasets in chunks, so the memory used does not grow with the number of steps.
+
+        Args:
+            duration: The time to simulate for
+            dt: Time step
+            record: The values to record, as :code:`'node_id.id'` strings or :code:`(node_id, id)` tuples, where id is
+                the id of a parameter, output port or input port of the node (looked up in that order)
+            decimation: Only record every n-th time step
+            array_format: A n-dimensional array
+            initializer: Values for input ports, as for :func:`evaluate`, set before the first time step
+            hdf5_group: If given, an open :code:`h5py` file or group, in which a dataset is created for the times and
+                each recorded value, rather than returning NumPy arrays
+            chunk_size: The number of recorded time steps to buffer before writing to **hdf5_group**
+
+        Returns:
+            A dict with the times of the recorded steps under :code:`'time'` and the recorded values under the
+            :code:`'node_id.id'` string of each item in **record**, either as NumPy arrays or as datasets in
+            **hdf5_group**
+        """
+        if dt <= 0 or duration < 0:
+            raise ValueError(
+                "Need a positive time step and non-negative duration, got dt=%s, duration=%s"
+                % (dt, duration)
+            )
+        if decimation < 1:
+            raise ValueError("Decimation must be at least 1, got %s" % decimation)
+
+        # Allow for rounding errors, so a duration which is a multiple of dt is included
+        n_steps = int(math.floor(duration / dt + 1e-9)) + 1
+        n_records = (n_steps - 1) // decimation + 1
+        buffer_size = n_records if hdf5_group is None else min(chunk_size, n_records)
+
+        sources = OrderedDict()
+        for r in record if record is not None else []:
+            name, source = self._get_record_source(r)
+            sources[name] = source
+
+        times = np.arange(n_records) * (dt * decimation)
+        if hdf5_group is None:
+            results = {"time": times}
+        else:
+            results = {"time": hdf5_group.create_dataset("time", data=times)}
+
+        buffers = {}
+        n_written = 0
+        n_buffered = 0
+
+        for step in range(n_steps):
+            if step == 0:
+                self.evaluate(array_format=array_format, initializer=initializer)
+            else:
+                self.evaluate(time_increment=dt, array_format=array_format)
+
+            if step % decimation != 0:
+                continue
+
+            for name, (evaluables, key) in sources.items():
+                value = evaluables[key].curr_value
+                buffer = buffers.get(name)
+                if buffer is None:
+                    buffer = buffers[name] = _allocate_record_buffer(value, buffer_size)
+                    if hdf5_group is None:
+                        results[name] = buffer
+                    else:
+                        results[name] = hdf5_group.create_dataset(
+                            name,
+                            shape=(n_records,) + buffer.shape[1:],
+                            dtype=buffer.dtype,
+                            chunks=True,
+                        )
+                elif np.shape(value) != buffer.shape[1:]:
+                    raise ValueError(
+                        "Shape of %s changed from %s to %s at t=%s, cannot record it"
+                        % (name, buffer.shape[1:], np.shape(value), step * dt)
+                    )
+                buffer[n_buffered] = value
+            n_buffered += 1
+
+            if hdf5_group is not None and (
+                n_buffered == buffer_size or n_written + n_buffered == n_records
+            ):
+                for name, buffer in buffers.items():
+                    results[name][n_written : n_written + n_buffered] = buffer[
+                        :n_buffered
+                    ]
+                n_written += n_buffered
+                n_buffered = 0
+
+        return results
+
+    def _get_record_source(
+        self, record: Union[str, Tuple[str, str]]
+    ) -> Tuple[str, Tuple[Dict[str, Any], str]]:
+        """Find the evaluable to record for an item of the **record** argument of :func:`run`"""
+        if type(record) == str:
+            # Node ids may contain dots too, so find the node by trying each split
+            parts = record.split(".")
+            candidates = [
+                (".".join(parts[:i]), ".".join(parts[i:])) for i in range(1, len(parts))
+            ]
+        else:
+            candidates = [tuple(record)]
+
+        for node_id, key in candidates:
+            en = self.enodes.get(node_id)
+            if en is None:
+                continue
+            for evaluables in (
+                en.evaluable_parameters,
+                en.evaluable_outputs,
+                en.evaluable_inputs,
+            ):
+                if key in evaluables:
+                    return f"{node_id}.{key}", (evaluables, key)
+
+        raise ValueError(
+            "Cannot record %s, which is not a parameter or port of a node in graph %s"
+            % (record, self.graph.id)
+        )
 
     def evaluate_edge(
         self,
@@ -1042,28 +2254,25 @@ class EvaluableGraph:
             array_format: A n-dimensional array
 
         """
-        pre_node = self.enodes[edge.sender]
-        post_node = self.enodes[edge.receiver]
-        value = pre_node.evaluable_outputs[edge.sender_port].curr_value
-        weight = (
-            1
-            if not edge.parameters or not "weight" in edge.parameters
-            else edge.parameters["weight"]
-        )
+        self._evaluate_transfer(self.edge_transfers[id(edge)], array_format)
+
+    def _evaluate_transfer(
+        self, transfer: _EdgeTransfer, array_format: str = FORMAT_DEFAULT
+    ):
+        transfer.transfer(array_format)
 
         if self.verbose:
+            edge = transfer.edge
             print(
                 "  Edge %s connects %s to %s, passing %s with weight %s"
                 % (
                     edge.id,
-                    pre_node.node.id,
-                    post_node.node.id,
-                    _val_info(value),
-                    _val_info(weight),
+                    edge.sender,
+                    edge.receiver,
+                    _val_info(transfer.sender.curr_value),
+                    _val_info(transfer.weight),
                 )
             )
-        input_value = value if weight == 1 else value * weight
-        post_node.evaluable_inputs[edge.receiver_port].set_input_value(input_value)
 
     def parse_condition(
         self, condition: Union[Condition, dict]
@@ -1176,13 +2385,109 @@ class EvaluableGraph:
 from modelspec.utils import FORMAT_NUMPY
 
 
+def _parse_shape(shape: Any) -> Optional[Tuple[int, ...]]:
+    """The shape of a port as a tuple of ints, or None if it is not given or has variable dimensions"""
+    if isinstance(shape, str):
+        if len(shape.strip()) == 0:
+            return None
+        try:
+            shape = ast.literal_eval(shape)
+        except (ValueError, SyntaxError):
+            return None
+    if isinstance(shape, int):
+        shape = (shape,)
+    if isinstance(shape, (tuple, list)) and all(type(d) == int for d in shape):
+        return tuple(shape)
+    return None
+
+
+def _evaluate_placeholders(
+    graph: Graph,
+    initializer: Optional[Dict[str, Any]] = None,
+    dtype: Optional[np.dtype] = None,
+) -> "EvaluableGraph":
+    """
+    Evaluate a new :class:`EvaluableGraph` for **graph** once, with zeros of the shape and type of the graph inputs
+    which are not in **initializer**, keeping the buffers of its function calls and edges (see :func:`infer_shapes`).
+    """
+    initializer = dict(initializer) if initializer else {}
+    for node_id, ip_id in graph.inputs:
+        if ip_id in initializer:
+            continue
+        ip = [ip for ip in graph.get_node(node_id).input_ports if ip.id == ip_id][0]
+        shape = _parse_shape(ip.shape)
+        if shape is not None:
+            try:
+                input_dtype = np.dtype(ip.type) if ip.type else float
+            except TypeError:
+                input_dtype = float
+            initializer[ip_id] = np.zeros(shape, dtype=input_dtype)
+
+    egraph = EvaluableGraph(graph, verbose=False, dtype=dtype)
+    for en in egraph.enodes.values():
+        for call in en.get_function_calls().values():
+            call.reuse_buffer = call.supports_out
+    for transfer in egraph.edge_transfers.values():
+        transfer.reuse_buffer = True
+
+    egraph.evaluate(initializer=initializer, array_format=FORMAT_NUMPY)
+    return egraph
+
+
+def infer_shapes(
+    graph: Graph,
+    initializer: Optional[Dict[str, Any]] = None,
+    dtype: Optional[Union[str, type, np.dtype]] = None,
+) -> Dict[Tuple[str, str], Tuple[Tuple[int, ...], np.dtype]]:
+    """
+    Infer the shapes and dtypes of the values of the input ports, parameters, functions and output ports of the nodes
+    of a graph.
+
+    The graph is evaluated once (with the numpy array format) on a separate :class:`EvaluableGraph`, starting from the
+    values of its parameters, and zeros for the graph inputs (see :attr:`~modeci_mdf.mdf.Graph.inputs`) of the
+    :code:`shape` and :code:`type` given on their input ports. Graph inputs without a shape are left at their initial
+    value of 0, unless given in **initializer**. Nodes which are not run in the first evaluation (because of
+    conditions) are left out.
+
+    Args:
+        graph: The graph
+        initializer: Values for graph inputs, keyed by input port id as for :func:`EvaluableGraph.evaluate`
+        dtype: The dtype of floating point arrays, as for :class:`EvaluableGraph`
+
+    Returns:
+        The shape and dtype of every value, keyed by (node id, port, parameter or function id)
+    """
+    egraph = _evaluate_placeholders(graph, initializer, dtype)
+
+    shapes = {}
+    for node_id, en in egraph.enodes.items():
+        evaluables = [
+            en.evaluable_inputs,
+            en.evaluable_parameters,
+            en.evaluable_functions,
+            en.evaluable_outputs,
+        ]
+        for evaluable in evaluables:
+            for e_id, e in evaluable.items():
+                value = getattr(e, "curr_value", None)
+                if value is not None:
+                    try:
+                        value = np.asarray(value)
+                    except ValueError:
+                        # e.g. ragged lists
+                        continue
+                    shapes[(node_id, e_id)] = (value.shape, value.dtype)
+
+    return shapes
+
+
 def main(example_file: str, array_format: str = FORMAT_NUMPY, verbose: bool = False):
     """
     Main entry point for execution engine.
 
     Args:
         example_file: The MDF file to execute.
-        array_format: The format of arrays to use. Allowed values: 'numpy' or 'tensorflow'.
+        array_format: The format of arrays to use. Allowed values: 'numpy', 'torch' or 'tensorflow'.
         verbose: Whether to print output to standard out during execution.
 
     """
@@ -1219,6 +2524,8 @@ if __name__ == "__main__":
     from modelspec.utils import FORMAT_NUMPY, FORMAT_TENSORFLOW
 
     format = FORMAT_TENSORFLOW if "-tf" in sys.argv else FORMAT_NUMPY
+    if "-torch" in sys.argv:
+        format = FORMAT_TORCH
 
     print("Executing MDF file %s with scheduler" % example_file)
 
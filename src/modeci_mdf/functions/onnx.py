@@ -4,16 +4,14 @@ way somewhat defeats the performance purposes of ONNX since the overhead for eac
 allows us to test the MDF scheduler (which invokes Python functions) on any MDF model defined over ONNX operations. In
 the future, the MDF should probably just compile to ONNX (or some other IR) for execution.
 """
+import collections
 import functools
+import sys
+import threading
 
 import numpy as np
-import onnxruntime as ort
 import onnx.defs
 
-# Currently using sklearn2onnx API to define ONNX operations. This dependency can probably be removed pretty easily.
-# Do not remove this import even though it appears unused.
-import skl2onnx.algebra.onnx_ops
-
 from typing import Dict, Tuple, Any, List, Callable
 
 OpSchema = onnx.defs.OpSchema
@@ -23,9 +21,14 @@ FormalParameterOption = OpSchema.FormalParameterOption
 # from torch.onnx.symbolic_helper import _default_onnx_opset_version as onnx_opset_version
 onnx_opset_version = 13
 
+# Maximum number of onnxruntime sessions for single operators kept by run_onnx_op
+ONNX_SESSION_CACHE_SIZE = 256
+
 __all__ = [
     "predict_with_onnxruntime",
     "run_onnx_op",
+    "clear_onnx_session_cache",
+    "make_onnx_kwargs_call",
     "get_onnx_ops",
     "get_all_schemas_version",
 ]
@@ -52,7 +55,14 @@ def predict_with_onnxruntime(model_def, *inputs) -> Dict[str, np.array]:
         A dict of output values, keys are output names for the model. Values are
         the output values of the model.
     """
+    import onnxruntime as ort
+
     sess = ort.InferenceSession(model_def.SerializeToString())
+    return _run_session(sess, *inputs)
+
+
+def _run_session(sess, *inputs) -> Dict[str, np.array]:
+    """Run an onnxruntime session with a set of inputs, see :func:`predict_with_onnxruntime`"""
     names = [i.name for i in sess.get_inputs()]
     dinputs = {name: input for name, input in zip(names, inputs)}
     res = sess.run(None, dinputs)
@@ -75,6 +85,89 @@ def convert_type(v):
     return v
 
 
+# Sessions for single ONNX operators, see _get_onnx_op_session
+_onnx_session_cache = collections.OrderedDict()
+_onnx_session_cache_lock = threading.Lock()
+
+
+def _freeze(v: Any) -> Any:
+    """Convert an attribute value into a hashable form which can be used in a cache key."""
+    if isinstance(v, np.ndarray):
+        return ("ndarray", v.dtype.str, v.shape, v.tobytes())
+    elif isinstance(v, (list, tuple)):
+        return (type(v).__name__,) + tuple(_freeze(i) for i in v)
+    elif isinstance(v, dict):
+        return ("dict",) + tuple(sorted((k, _freeze(i)) for k, i in v.items()))
+    elif hasattr(v, "SerializeToString"):
+        # e.g. a TensorProto
+        return (type(v).__name__, v.SerializeToString())
+
+    # Keep the type, so that e.g. 1 and 1.0 (which build different ONNX attributes) have different keys
+    hash(v)
+    return (type(v).__name__, v)
+
+
+def _get_onnx_op_session(
+    op_name: str,
+    inputs: Dict[str, np.array],
+    output_names: List[str],
+    opset_version: int,
+    attributes: Dict[str, Any],
+):
+    """
+    Get an onnxruntime session for a single ONNX operator. Building the operator and creating the session is
+    expensive compared to running it, so sessions are kept in a bounded LRU cache keyed on the operator, opset,
+    attributes and the dtypes and shapes of the inputs.
+    """
+    try:
+        key = (
+            op_name,
+            opset_version,
+            tuple(output_names),
+            tuple((k, v.dtype.str, v.shape) for k, v in inputs.items()),
+            _freeze(attributes),
+        )
+    except (AttributeError, TypeError):
+        # Inputs or attributes we can't build a key for, just don't cache these
+        key = None
+
+    if key is not None:
+        with _onnx_session_cache_lock:
+            sess = _onnx_session_cache.get(key)
+            if sess is not None:
+                _onnx_session_cache.move_to_end(key)
+                return sess
+
+    # Currently using sklearn2onnx API to define ONNX operations. This dependency can probably be removed pretty
+    # easily. It is slow to import, so only do so when an operation is actually run.
+    import skl2onnx.algebra.onnx_ops
+    import onnxruntime as ort
+
+    op_class = import_class(f"skl2onnx.algebra.onnx_ops.Onnx{op_name}")
+    op = op_class(
+        *inputs.keys(),
+        output_names=output_names,
+        op_version=opset_version,
+        **attributes,
+    )
+    model_def = op.to_onnx(inputs)
+    sess = ort.InferenceSession(model_def.SerializeToString())
+
+    if key is not None:
+        with _onnx_session_cache_lock:
+            _onnx_session_cache[key] = sess
+            while len(_onnx_session_cache) > ONNX_SESSION_CACHE_SIZE:
+                _onnx_session_cache.popitem(last=False)
+
+    return sess
+
+
+def clear_onnx_session_cache():
+    """Remove all onnxruntime sessions cached by :func:`run_onnx_op`."""
+    with _onnx_session_cache_lock:
+        _onnx_session_cache.clear()
+
+
 def run_onnx_op(
     op_name: str,
     inputs: Dict[str, np.array],
@@ -88,7 +181,8 @@ def run_onnx_op(
     in ONNX because graphs usually consist of more than one operation.
     This wrapper probably creates a significant amount of overhead for
     but if we want to execute and ONNX graph op by op it is the easiest
-    thing to do.
+    thing to do. The onnxruntime session for each distinct operator, attributes
+    and input types is only created once, see :data:`ONNX_SESSION_CACHE_SIZE`.
 
     Args:
         op_name: The name of the operation to run, (Conv, Pad, etc.)
@@ -116,14 +210,10 @@ def run_onnx_op(
             if cval.dtype != data.dtype:
                 inputs["constant_value"] = cval.astype(data.dtype)
 
-    op_class = import_class(f"skl2onnx.algebra.onnx_ops.Onnx{op_name}")
-    input_names = list(inputs.keys())
-    input_vals = list(inputs.values())
-    op = op_class(
-        *input_names, output_names=output_names, op_version=opset_version, **attributes
+    sess = _get_onnx_op_session(
+        op_name, inputs, output_names, opset_version, attributes
     )
-    model_def = op.to_onnx(inputs)
-    return predict_with_onnxruntime(model_def, *input_vals)
+    return _run_session(sess, *inputs.values())
 
 
 def get_all_schemas_version(max_version: int) -> List[onnx.defs.OpSchema]:
@@ -152,6 +242,14 @@ def get_all_schemas_version(max_version: int) -> List[onnx.defs.OpSchema]:
     return list(schemas.values())
 
 
+@functools.lru_cache()
+def _get_schemas_by_func_name(max_version: int) -> Dict[str, onnx.defs.OpSchema]:
+    """Map the (lowercase) name of the generated ONNX python functions to their OpSchemas"""
+    return {
+        schema.name.lower(): schema for schema in get_all_schemas_version(max_version)
+    }
+
+
 @functools.lru_cache()
 def get_onnx_schema(
     func_name: str, opset_version: int = onnx_opset_version
@@ -170,13 +268,8 @@ def get_onnx_schema(
         onnx.defs.OpSchema: The ONNX schema corresponding to function **func_name**
     """
     try:
-        schema = list(
-            filter(
-                lambda f: f.name.lower() == func_name,
-                get_all_schemas_version(onnx_opset_version),
-            )
-        )[0]
-    except IndexError:
+        schema = _get_schemas_by_func_name(onnx_opset_version)[func_name]
+    except KeyError:
         raise ValueError("No corresponding onnx schema for %s" % func_name)
     else:
         return schema
@@ -320,28 +413,84 @@ def _make_onnx_function(schema: onnx.defs.OpSchema) -> Callable:
     return onnx_wrapper
 
 
-def _define_onnx_functions(opset_version):
+def make_onnx_kwargs_call(
+    schema: onnx.defs.OpSchema, names: Tuple[str, ...]
+) -> Callable:
     """
-    Enumerate all ONNX operators and define Python Callable functions for each one. This kind of defeats the purpose of
-    ONNX since we are paying the overhead for invoking each of these functions separately from Python. However, for now,
-    this hack will allow us to test any MDF model that is composed of ONNX functions through the scheduler.
+    Create a function which runs the ONNX operator for **schema** with keyword arguments **names**, like the function
+    created by :func:`_make_onnx_function` does, but with the values passed positionally in the order of **names**.
+    Which arguments are inputs and which are attributes is worked out once, rather than on every call.
+
+    Args:
+        schema: The ONNX schema of the operator.
+        names: The names of the keyword arguments.
+
+    Returns:
+        A function taking the values of the arguments, returning the output of the operator (or a tuple of them if it
+        has more than one)
     """
-    import sys
+    if schema.name in ("Constant", "ConstantOfShape"):
+        # These need special handling, leave it to the generic function
+        onnx_function = _make_onnx_function(schema)
+        return lambda *values: onnx_function(**dict(zip(names, values)))
+
+    if (
+        len(schema.inputs) > 0
+        and schema.inputs[0].option == FormalParameterOption.Variadic
+    ):
+        # Any argument which is not an attribute is one of the variadic inputs
+        input_indices = [i for i, n in enumerate(names) if n not in schema.attributes]
+    else:
+        input_indices = [
+            names.index(inp.name) for inp in schema.inputs if inp.name in names
+        ]
+
+    attribute_indices = [i for i in range(len(names)) if i not in input_indices]
+    for i in attribute_indices:
+        if names[i] not in schema.attributes:
+            raise ValueError(
+                f"Passed unkown attribute ({names[i]}) to ONNX op {schema.name}, supported attributes: {list(schema.attributes)}"
+            )
 
-    current_module = sys.modules[__name__]
+    output_names = [out.name for out in schema.outputs]
 
-    for schema in get_all_schemas_version(opset_version):
+    def onnx_kwargs_call(*values):
+        out_dict = run_onnx_op(
+            op_name=schema.name,
+            inputs={names[i]: values[i] for i in input_indices},
+            output_names=output_names,
+            **{names[i]: values[i] for i in attribute_indices},
+        )
+
+        if len(out_dict) == 1:
+            return tuple(out_dict.values())[0]
+        else:
+            return tuple(out_dict.values())
 
-        onnx_wrapper = _make_onnx_function(schema)
+    return onnx_kwargs_call
 
-        # Lets call this function a lowercase version of the opname, follow PEP 8
-        func_name = schema.name.lower()
 
-        # Lets add some documentation.
-        onnx_wrapper.__doc__ = schema.doc
+def __getattr__(func_name: str) -> Callable:
+    """
+    Define a Python Callable function for an ONNX operator the first time it is accessed on this module. This kind of
+    defeats the purpose of ONNX since we are paying the overhead for invoking each of these functions separately from
+    Python. However, for now, this hack will allow us to test any MDF model that is composed of ONNX functions through
+    the scheduler. Functions are called with a lowercase version of the opname, to follow PEP 8.
+    """
+    if func_name.startswith("_"):
+        raise AttributeError(f"module {__name__!r} has no attribute {func_name!r}")
 
-        setattr(current_module, func_name, onnx_wrapper)
+    try:
+        schema = get_onnx_schema(func_name)
+    except ValueError:
+        raise AttributeError(f"module {__name__!r} has no attribute {func_name!r}")
 
+    onnx_wrapper = _make_onnx_function(schema)
 
-# Define all ONNX operators as functions on this module.
-_define_onnx_functions(onnx_opset_version)
+    # Lets add some documentation.
+    onnx_wrapper.__doc__ = schema.doc
+
+    # Define it on the module, so this is only done once per operator
+    setattr(sys.modules[__name__], func_name, onnx_wrapper)
+
+    return onnx_wrapper
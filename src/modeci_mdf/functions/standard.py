@@ -4,7 +4,9 @@ Implementation of core MDF function ontology.
 This module implements and registers all builtin MDF functions.
 
 """
-from typing import List, Dict
+import collections.abc
+import re
+from typing import List, Dict, Any, Callable, Iterator, Optional
 
 # Make sure we import math and numpy for Python expression strings. These imports
 # are important, do not remove even though they appear unused.
@@ -12,10 +14,110 @@ import math
 import numpy
 
 
+class MdfFunctionRegistry(collections.abc.MutableMapping):
+    """A dict of registered MDF functions, keyed by function name.
+
+    Functions can either be added directly, or be contributed by a provider; a callable returning a list of
+    specifications (dicts of arguments for :func:`add_mdf_function`). Providers are only called the first time a
+    name is looked up which has not been added directly (or the registry is iterated over), and the Python function
+    for each of their entries is only created when that entry is first accessed. This keeps the hundreds of ONNX and
+    ACT-R functions from being defined when only a few standard functions are used.
+    """
+
+    def __init__(self):
+        self._functions = {}
+        self._providers = []
+
+    def add_provider(self, provider: Callable[[], List[Dict[str, Any]]]):
+        """Register a provider of MDF function specifications, which will be called on demand.
+
+        Args:
+            provider: A callable returning a list of MDF function specifications, each a dict of arguments for
+                :func:`add_mdf_function`
+        """
+        self._providers.append(provider)
+
+    def _load_providers(self):
+        while len(self._providers) > 0:
+            provider = self._providers.pop(0)
+            for spec in provider():
+                # Functions which have been added directly take precedence
+                self._functions.setdefault(spec["name"], _LazyMdfFunction(spec))
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        if name not in self._functions:
+            self._load_providers()
+
+        func = self._functions[name]
+        if isinstance(func, _LazyMdfFunction):
+            func = _create_mdf_function(**func.spec)
+            self._functions[name] = func
+        return func
+
+    def __setitem__(self, name: str, func: Dict[str, Any]):
+        self._functions[name] = func
+
+    def __delitem__(self, name: str):
+        if name not in self._functions:
+            self._load_providers()
+        del self._functions[name]
+
+    def __contains__(self, name: object) -> bool:
+        if name not in self._functions:
+            self._load_providers()
+        return name in self._functions
+
+    def __iter__(self) -> Iterator[str]:
+        self._load_providers()
+        return iter(list(self._functions))
+
+    def __len__(self) -> int:
+        self._load_providers()
+        return len(self._functions)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class _LazyMdfFunction:
+    """Placeholder for the specification of a registered function which has not been accessed yet"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+
+
 """
 A dict that stores all registered MDF functions.
 """
-mdf_functions = {}
+mdf_functions = MdfFunctionRegistry()
+
+
+def _create_mdf_function(
+    name: str = None,
+    description: str = None,
+    arguments: List[str] = None,
+    expression_string: str = None,
+    function: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """Create the registry entry for an MDF function, see :func:`add_mdf_function`"""
+
+    mdf_function = {}
+
+    mdf_function["description"] = description
+    mdf_function["arguments"] = arguments
+    mdf_function["expression_string"] = expression_string
+    if function is not None:
+        mdf_function["function"] = function
+    else:
+        try:
+            mdf_function["function"] = create_python_function(
+                name, expression_string, arguments
+            )
+        except SyntaxError:
+            # invalid syntax in some onnx functions (e.g. onnx_ops.or)
+            mdf_function["function"] = None
+
+    return mdf_function
 
 
 def add_mdf_function(
@@ -23,6 +125,7 @@ def add_mdf_function(
     description: str = None,
     arguments: List[str] = None,
     expression_string: str = None,
+    function: Optional[Callable] = None,
 ):
 
     """Register a function with MDF function ontology.
@@ -34,24 +137,31 @@ def add_mdf_function(
         description: Information about the function
         arguments: Inputs provided to obtain the result of function
         expression_string: Function expression in string format
+        function: Python implementation of the function, taking **arguments** as keyword arguments. If None, this is
+            created from **expression_string**
 
     Returns:
         Updates mdf_functions
 
     """
 
-    mdf_functions[name] = {}
+    mdf_functions[name] = _create_mdf_function(
+        name, description, arguments, expression_string, function
+    )
 
-    mdf_functions[name]["description"] = description
-    mdf_functions[name]["arguments"] = arguments
-    mdf_functions[name]["expression_string"] = expression_string
-    try:
-        mdf_functions[name]["function"] = create_python_function(
-            name, expression_string, arguments
-        )
-    except SyntaxError:
-        # invalid syntax in some onnx functions (e.g. onnx_ops.or)
-        mdf_functions[name]["function"] = None
+
+def _get_onnx_function_specs() -> List[Dict[str, Any]]:
+    """Enumerate all available ONNX operators as MDF function specifications."""
+    from modeci_mdf.functions.onnx import get_onnx_ops
+
+    return get_onnx_ops()
+
+
+def _get_actr_function_specs() -> List[Dict[str, Any]]:
+    """Enumerate the ACT-R functions as MDF function specifications."""
+    from modeci_mdf.functions.actr import get_actr_functions
+
+    return get_actr_functions()
 
 
 def create_python_expression(expression_string: str = None) -> str:
@@ -64,14 +174,12 @@ def create_python_expression(expression_string: str = None) -> str:
         function expression in python
     """
 
-    for func in ["exp", "sin", "cos"]:
-        if "math." + func not in expression_string:
-
-            expression_string = expression_string.replace(
-                "%s(" % func, "math.%s(" % func
-            )
-    for func in ["maximum"]:
-        expression_string = expression_string.replace("%s(" % func, "numpy.%s(" % func)
+    # Use the numpy versions, which work on arrays as well as scalars. Calls which already have a module (e.g.
+    # math.exp) are left alone.
+    for func in ["exp", "sin", "cos", "maximum"]:
+        expression_string = re.sub(
+            r"(?<![\w.])%s\(" % func, "numpy.%s(" % func, expression_string
+        )
 
     return expression_string
 
@@ -120,6 +228,51 @@ def create_python_function(
     return res[name]
 
 
+# Vectorized implementations of the standard functions, which work on numpy arrays as well as scalars. Each
+# evaluates the same operations in the same order as its expression_string, and takes an optional out array which
+# the result is written to in place.
+
+
+def _linear(variable0, slope, intercept, out=None):
+    result = numpy.multiply(variable0, slope, out=out)
+    return numpy.add(result, intercept, out=out)
+
+
+def _logistic(variable0, gain, bias, offset, out=None):
+    result = numpy.add(variable0, bias, out=out)
+    result = numpy.multiply(result, -1 * gain, out=out)
+    result = numpy.add(result, offset, out=out)
+    result = numpy.exp(result, out=out)
+    result = numpy.add(result, 1, out=out)
+    return numpy.divide(1, result, out=out)
+
+
+def _exponential(variable0, scale, rate, bias, offset, out=None):
+    result = numpy.multiply(rate, variable0, out=out)
+    result = numpy.add(result, bias, out=out)
+    result = numpy.exp(result, out=out)
+    result = numpy.multiply(scale, result, out=out)
+    return numpy.add(result, offset, out=out)
+
+
+def _sin(variable0, scale, out=None):
+    result = numpy.sin(variable0, out=out)
+    return numpy.multiply(scale, result, out=out)
+
+
+def _cos(variable0, scale, out=None):
+    result = numpy.cos(variable0, out=out)
+    return numpy.multiply(scale, result, out=out)
+
+
+def _matmul(A, B, out=None):
+    return numpy.matmul(A, B, out=out)
+
+
+def _relu(A, out=None):
+    return numpy.maximum(A, 0, out=out)
+
+
 # Populate the list of known functions
 
 if len(mdf_functions) == 0:
@@ -132,6 +285,7 @@ if len(mdf_functions) == 0:
         description="A linear function, calculated from a slope and an intercept",
         arguments=[STANDARD_ARG_0, "slope", "intercept"],
         expression_string="(%s * slope + intercept)" % (STANDARD_ARG_0),
+        function=_linear,
     )
 
     add_mdf_function(
@@ -140,6 +294,7 @@ if len(mdf_functions) == 0:
         arguments=[STANDARD_ARG_0, "gain", "bias", "offset"],
         expression_string="1/(1 + exp(-1*gain*(%s + bias) + offset))"
         % (STANDARD_ARG_0),
+        function=_logistic,
     )
 
     add_mdf_function(
@@ -147,6 +302,7 @@ if len(mdf_functions) == 0:
         description="Exponential function",
         arguments=[STANDARD_ARG_0, "scale", "rate", "bias", "offset"],
         expression_string="scale * exp((rate * %s) + bias) + offset" % (STANDARD_ARG_0),
+        function=_exponential,
     )
 
     add_mdf_function(
@@ -154,6 +310,7 @@ if len(mdf_functions) == 0:
         description="Sine function",
         arguments=[STANDARD_ARG_0, "scale"],
         expression_string="scale * sin(%s)" % (STANDARD_ARG_0),
+        function=_sin,
     )
 
     add_mdf_function(
@@ -161,6 +318,7 @@ if len(mdf_functions) == 0:
         description="Cosine function",
         arguments=[STANDARD_ARG_0, "scale"],
         expression_string="scale * cos(%s)" % (STANDARD_ARG_0),
+        function=_cos,
     )
 
     add_mdf_function(
@@ -168,6 +326,7 @@ if len(mdf_functions) == 0:
         description="Matrix multiplication (work in progress...)",
         arguments=["A", "B"],
         expression_string="A @ B",
+        function=_matmul,
     )
 
     add_mdf_function(
@@ -175,19 +334,13 @@ if len(mdf_functions) == 0:
         description="Rectified linear function (work in progress...)",
         arguments=["A"],
         expression_string="maximum(A,0)",
+        function=_relu,
     )
 
-    # Enumerate all available ONNX operators and add them as MDF functions.
-    from modeci_mdf.functions.onnx import get_onnx_ops
-
-    for mdf_func_spec in get_onnx_ops():
-        add_mdf_function(**mdf_func_spec)
-
-    # Add the ACT-R functions.
-    from modeci_mdf.functions.actr import get_actr_functions
-
-    for mdf_func_spec in get_actr_functions():
-        add_mdf_function(**mdf_func_spec)
+    # All available ONNX operators and the ACT-R functions are added as MDF functions
+    # the first time they are needed.
+    mdf_functions.add_provider(_get_onnx_function_specs)
+    mdf_functions.add_provider(_get_actr_function_specs)
 
 
 if __name__ == "__main__":
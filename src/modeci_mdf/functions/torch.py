@@ -0,0 +1,122 @@
+"""
+Implementations of the standard MDF functions and of ONNX operators on `PyTorch <https://pytorch.org>`_ tensors, used
+by the execution engine when evaluating with the :code:`'torch'` array format (see
+:func:`~modeci_mdf.execution_engine.EvaluableGraph.evaluate`). This lets a graph run with torch's own (intra-op
+parallel) kernels, rather than numpy or a separate onnxruntime session for every ONNX operator.
+
+ONNX operators are evaluated with the modules in :mod:`~modeci_mdf.interfaces.pytorch.mod_torch_builtins` where there
+is one. Others are left to the execution engine, which runs them with onnxruntime on the numpy values of the tensors.
+"""
+from typing import Any, Callable, Optional
+
+import numpy as np
+import torch
+
+__all__ = [
+    "to_tensor",
+    "to_numpy",
+    "cast_floats",
+    "standard_functions",
+    "get_onnx_module",
+]
+
+
+def to_tensor(value: Any) -> Any:
+    """Convert a numpy array (or list) of numbers to a tensor, leaving tensors and all other values unchanged"""
+    if isinstance(value, list):
+        value = np.array(value)
+    if isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+        return torch.as_tensor(value)
+    return value
+
+
+def _as_tensor(value: Any) -> torch.Tensor:
+    """Convert a number to a tensor via numpy, so that e.g. Python floats become float64 tensors as in numpy"""
+    if isinstance(value, torch.Tensor):
+        return value
+    return torch.as_tensor(np.asarray(value))
+
+
+def to_numpy(value: Any) -> Any:
+    """Convert a tensor to a numpy array, leaving all other values unchanged"""
+    if isinstance(value, torch.Tensor):
+        return value.detach().cpu().numpy()
+    return value
+
+
+def cast_floats(value: Any, dtype: np.dtype) -> Any:
+    """Cast a floating point tensor to the torch dtype of the numpy **dtype**, leaving all other values unchanged"""
+    if isinstance(value, torch.Tensor) and value.is_floating_point():
+        torch_dtype = torch.from_numpy(np.zeros(0, dtype=dtype)).dtype
+        if value.dtype != torch_dtype:
+            return value.to(torch_dtype)
+    return value
+
+
+# The standard functions of modeci_mdf.functions.standard, evaluating the same operations in the same order as their
+# expression strings
+
+
+def _linear(variable0, slope, intercept):
+    return variable0 * slope + intercept
+
+
+def _logistic(variable0, gain, bias, offset):
+    return 1 / (1 + torch.exp(_as_tensor(-1 * gain * (variable0 + bias) + offset)))
+
+
+def _exponential(variable0, scale, rate, bias, offset):
+    return scale * torch.exp(_as_tensor((rate * variable0) + bias)) + offset
+
+
+def _sin(variable0, scale):
+    return scale * torch.sin(_as_tensor(variable0))
+
+
+def _cos(variable0, scale):
+    return scale * torch.cos(_as_tensor(variable0))
+
+
+def _matmul(A, B):
+    return torch.matmul(A, B)
+
+
+def _relu(A):
+    return torch.relu(_as_tensor(A))
+
+
+#: Torch implementations of the standard MDF functions, keyed by function name
+standard_functions = {
+    "linear": _linear,
+    "logistic": _logistic,
+    "exponential": _exponential,
+    "sin": _sin,
+    "cos": _cos,
+    "MatMul": _matmul,
+    "Relu": _relu,
+}
+
+_onnx_modules = None
+
+
+def get_onnx_module(op_name: str) -> Optional[Callable[..., torch.nn.Module]]:
+    """
+    Get the module class in :mod:`~modeci_mdf.interfaces.pytorch.mod_torch_builtins` implementing an ONNX operator.
+
+    Args:
+        op_name: The name of the ONNX operator, in any case (e.g. :code:`Add` or :code:`add`)
+
+    Returns:
+        The module class, which takes the attributes of the operator as keyword arguments and its inputs as arguments
+        of :code:`forward`, or None if there isn't one
+    """
+    global _onnx_modules
+    if _onnx_modules is None:
+        from modeci_mdf.interfaces.pytorch import mod_torch_builtins
+
+        _onnx_modules = {
+            name.lower(): getattr(mod_torch_builtins, name)
+            for name in mod_torch_builtins.__all__
+        }
+
+    return _onnx_modules.get(op_name.lower())
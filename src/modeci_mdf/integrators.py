@@ -0,0 +1,279 @@
+"""
+Integrators for advancing the :code:`time_derivative` parameters of a graph by one time step during MDF graph
+execution.
+
+By default (:class:`EulerIntegrator`), each parameter with a :code:`time_derivative` is advanced with forward Euler as
+its node is evaluated. The other integrators gather the values of all such parameters in a graph into a single state
+vector, evaluate the time derivatives of the whole graph at a number of intermediate states, and advance the state
+vector as a whole. This takes more evaluations per step, but allows much larger time steps for the same accuracy.
+"""
+import sys
+from typing import Any, List, Tuple, Union
+
+import numpy as np
+
+__all__ = [
+    "Integrator",
+    "EulerIntegrator",
+    "RK4Integrator",
+    "RK45Integrator",
+    "INTEGRATORS",
+    "get_integrator",
+]
+
+
+class Integrator:
+    """
+    Base class for integrators, which advance an :class:`~modeci_mdf.execution_engine.EvaluableGraph` by one time
+    step in :func:`step`.
+    """
+
+    def step(self, egraph: "EvaluableGraph", time_increment: float, array_format: str):
+        """
+        Advance all states of the graph by **time_increment**, and evaluate all nodes at the new states.
+
+        Args:
+            egraph: The graph to advance
+            time_increment: Time step
+            array_format: The array format to use
+        """
+        raise NotImplementedError()
+
+    def reset(self):
+        """Forget any state kept from previous steps, called by :func:`~modeci_mdf.execution_engine.EvaluableGraph.reset`"""
+        pass
+
+
+class EulerIntegrator(Integrator):
+    """
+    Forward Euler. Each parameter with a :code:`time_derivative` is advanced as its node is evaluated, so parameters
+    evaluated later in a step see the updated values of those evaluated before them.
+    """
+
+    def step(self, egraph: "EvaluableGraph", time_increment: float, array_format: str):
+        egraph.evaluate_nodes(time_increment=time_increment, array_format=array_format)
+
+
+class _StateVectorIntegrator(Integrator):
+    """
+    Base class for integrators which advance all states of a graph together. Subclasses implement :func:`integrate`,
+    using :func:`derivative` to evaluate the time derivatives at a given state.
+    """
+
+    def step(self, egraph: "EvaluableGraph", time_increment: float, array_format: str):
+        states = [
+            ep
+            for en in egraph.enodes.values()
+            for ep in en.evaluable_parameters.values()
+            if ep.parameter.time_derivative is not None
+        ]
+
+        # The other parameters (e.g. count = count + increment) are restored after each evaluation of the derivatives,
+        # so they are only updated once per step.
+        others = [
+            ep
+            for en in egraph.enodes.values()
+            for ep in en.evaluable_parameters.values()
+            if ep.parameter.time_derivative is None
+        ]
+        others_values = [ep.curr_value for ep in others]
+
+        shapes = [np.shape(ep.curr_value) for ep in states]
+        y0 = self._pack([ep.curr_value for ep in states])
+
+        def derivative(y: np.ndarray) -> np.ndarray:
+            for ep, value in zip(others, others_values):
+                ep.curr_value = value
+            for ep, value in zip(states, self._unpack(y, shapes)):
+                ep.curr_value = value
+
+            # With a time increment of 0 the time derivatives are evaluated, but no states change
+            egraph.evaluate_nodes(time_increment=0, array_format=array_format)
+
+            return self._pack([ep.curr_time_derivative for ep in states], like=y0)
+
+        y1 = self.integrate(derivative, y0, time_increment)
+
+        # Evaluate everything once more at the new states, which also updates the other parameters for this step
+        for ep, value in zip(others, others_values):
+            ep.curr_value = value
+        for ep, value in zip(states, self._unpack(y1, shapes)):
+            ep.curr_value = value
+        egraph.evaluate_nodes(time_increment=0, array_format=array_format)
+
+    @staticmethod
+    def _pack(values: List[Any], like: Any = None) -> Any:
+        """
+        Flatten **values** into a single state vector, a PyTorch tensor if any of them are tensors and otherwise a NumPy
+        array, with the floating point dtype the values result in (or the dtype of **like**, if given).
+        """
+        # Tensors can only be in the states if PyTorch has already been imported
+        torch = sys.modules.get("torch")
+        if torch is not None and any(isinstance(v, torch.Tensor) for v in values):
+            y = torch.cat([torch.flatten(torch.as_tensor(v)) for v in values])
+            if like is not None:
+                return y.to(like.dtype)
+            return y if y.is_floating_point() else y.to(torch.get_default_dtype())
+
+        arrays = [np.ravel(v) for v in values]
+        if like is not None:
+            dtype = like.dtype
+        else:
+            dtype = np.result_type(*[a.dtype for a in arrays], bool)
+            if dtype.kind != "f":
+                dtype = np.dtype(float)
+        return np.concatenate(arrays or [np.zeros(0)]).astype(dtype, copy=False)
+
+    @staticmethod
+    def _unpack(y: Any, shapes: List[Tuple[int, ...]]) -> List[Any]:
+        values = []
+        i = 0
+        for shape in shapes:
+            shape = tuple(shape)
+            size = int(np.prod(shape))
+            value = y[i : i + size].reshape(shape)
+            values.append(value[()] if shape == () else value)
+            i += size
+        return values
+
+    def integrate(self, derivative, y: np.ndarray, dt: float) -> np.ndarray:
+        """
+        Advance the state vector **y** by **dt**.
+
+        Args:
+            derivative: Function which returns the time derivative of the state vector at a given state vector
+            y: The state vector at the start of the step
+            dt: Time step
+
+        Returns:
+            The state vector at the end of the step
+        """
+        raise NotImplementedError()
+
+
+class RK4Integrator(_StateVectorIntegrator):
+    """The classical fourth order Runge-Kutta method, with four evaluations of the time derivatives per step."""
+
+    def integrate(self, derivative, y: np.ndarray, dt: float) -> np.ndarray:
+        k1 = derivative(y)
+        k2 = derivative(y + 0.5 * dt * k1)
+        k3 = derivative(y + 0.5 * dt * k2)
+        k4 = derivative(y + dt * k3)
+
+        return y + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+class RK45Integrator(_StateVectorIntegrator):
+    """
+    The adaptive Dormand-Prince Runge-Kutta 5(4) method. Each time step is made up of as many substeps as are needed
+    to keep the estimated local error within the tolerances, and the size of the last successful substep is used as
+    the first guess in the next time step.
+
+    Args:
+        rtol: Relative tolerance
+        atol: Absolute tolerance
+        max_substeps: Maximum number of substeps in a time step, a RuntimeError is raised if more are needed
+    """
+
+    # Coefficients of the stages (the time derivatives don't depend explicitly on time)
+    _A = [
+        [],
+        [1 / 5],
+        [3 / 40, 9 / 40],
+        [44 / 45, -56 / 15, 32 / 9],
+        [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+        [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+        [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+    ]
+    # Fifth order solution
+    _B = [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0]
+    # Difference of the fifth and embedded fourth order solutions, the error estimate
+    _E = [
+        71 / 57600,
+        0,
+        -71 / 16695,
+        71 / 1920,
+        -17253 / 339200,
+        22 / 525,
+        -1 / 40,
+    ]
+
+    def __init__(
+        self, rtol: float = 1e-6, atol: float = 1e-9, max_substeps: int = 10000
+    ):
+        self.rtol = rtol
+        self.atol = atol
+        self.max_substeps = max_substeps
+        self.substep = None
+
+    def reset(self):
+        self.substep = None
+
+    def integrate(self, derivative, y: np.ndarray, dt: float) -> np.ndarray:
+        t = 0.0
+        h = dt if self.substep is None else self.substep
+        k_first = derivative(y)
+
+        for i in range(self.max_substeps):
+            h_step = min(h, dt - t)
+
+            k = [k_first]
+            for a in self._A[1:]:
+                k.append(derivative(y + h_step * sum(aj * kj for aj, kj in zip(a, k))))
+
+            y_new = y + h_step * sum(b * ki for b, ki in zip(self._B, k))
+            # The error norm is computed with NumPy, also for PyTorch tensor states
+            err_scale = self.atol + self.rtol * np.maximum(
+                np.abs(np.asarray(y)), np.abs(np.asarray(y_new))
+            )
+            err = (
+                np.asarray(h_step * sum(e * ki for e, ki in zip(self._E, k)))
+                / err_scale
+            )
+            err_norm = np.sqrt(np.mean(err ** 2)) if len(err) > 0 else 0.0
+
+            factor = 5 if err_norm == 0 else 0.9 * err_norm ** -0.2
+            h = h_step * min(5, max(0.2, factor))
+
+            if err_norm <= 1:
+                t += h_step
+                y = y_new
+                # The last stage was evaluated at the new state (first same as last)
+                k_first = k[-1]
+
+                if dt - t <= 1e-12 * dt:
+                    self.substep = h
+                    return y
+
+        raise RuntimeError(
+            "RK45 integration needed more than %i substeps for a time step of %s"
+            % (self.max_substeps, dt)
+        )
+
+
+INTEGRATORS = {
+    "euler": EulerIntegrator,
+    "rk4": RK4Integrator,
+    "rk45": RK45Integrator,
+}
+
+
+def get_integrator(integrator: Union[str, Integrator]) -> Integrator:
+    """
+    Get an integrator by name (one of :data:`INTEGRATORS`), or pass an :class:`Integrator` instance through.
+
+    Args:
+        integrator: The name of the integrator, or an integrator
+
+    Returns:
+        The integrator
+    """
+    if isinstance(integrator, Integrator):
+        return integrator
+
+    try:
+        return INTEGRATORS[integrator]()
+    except KeyError:
+        raise ValueError(
+            "Unknown integrator: %s, use one of %s" % (integrator, list(INTEGRATORS))
+        )
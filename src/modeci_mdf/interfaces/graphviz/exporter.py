@@ -4,6 +4,7 @@ Simple export of MDF to GraphViz for generating graphics.
 Work in progress...
 """
 
+import re
 import sys
 
 import graphviz
@@ -11,7 +12,7 @@ import numpy as np
 
 from modeci_mdf.functions.standard import mdf_functions
 
-from modeci_mdf.utils import color_rgb_to_hex
+from modeci_mdf.utils import color_rgb_to_hex, get_expression_symbols
 
 from modelspec.utils import _val_info
 
@@ -94,22 +95,34 @@ def match_in_expr(s, node):
     if type(s) != str:
         return "%s" % _val_info(s)
     else:
-        for p in node.parameters:
-            if p.id in s:
-                s = s.replace(p.id, format_param(p.id))
-
-        for ip in node.input_ports:
-            if ip.id in s:
-                s = s.replace(ip.id, format_input(ip.id))
-
-        for f in node.functions:
-            if f.id in s:
-                s = s.replace(f.id, format_func(f.id))
-
-        for op in node.output_ports:
-            if op.id in s:
-                s = s.replace(op.id, format_output(op.id))
-        return s
+        # Parameters take precedence over input ports, functions and output ports with the same id
+        formats = {}
+        for elements, format_element in (
+            (node.output_ports, format_output),
+            (node.functions, format_func),
+            (node.input_ports, format_input),
+            (node.parameters, format_param),
+        ):
+            for e in elements:
+                formats[e.id] = format_element
+
+        if s in formats:
+            return formats[s](s)
+
+        try:
+            symbols = get_expression_symbols(s)
+        except Exception:
+            # Not an expression
+            return s
+
+        # Only format whole identifiers, e.g. not a parameter a inside another parameter abc
+        return re.sub(
+            r"[A-Za-z_]\w*",
+            lambda m: formats[m.group()](m.group())
+            if m.group() in symbols and m.group() in formats
+            else m.group(),
+            s,
+        )
 
 
 def mdf_to_graphviz(
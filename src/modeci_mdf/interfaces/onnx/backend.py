@@ -0,0 +1,329 @@
+"""
+Code for executing MDF graphs composed entirely of ONNX operations (e.g. the output of
+:func:`~modeci_mdf.interfaces.onnx.onnx_to_mdf` or :func:`~modeci_mdf.interfaces.pytorch.pytorch_to_mdf`) as a single
+fused ONNX model, rather than invoking onnxruntime separately for every node.
+"""
+import collections
+import typing
+
+import numpy as np
+
+import onnx
+from onnx import helper, numpy_helper
+
+import modeci_mdf.functions.onnx as onnx_ops
+from modeci_mdf.mdf import Graph, Node
+from modeci_mdf.execution_engine import parse_str_as_list, evaluate_expr
+
+# Maximum number of onnxruntime sessions (one per distinct set of input dtypes and shapes) kept per graph
+ONNX_GRAPH_SESSION_CACHE_SIZE = 8
+
+ONNX_FUNCTION_PREFIX = "onnx::"
+
+AttrType = onnx.defs.OpSchema.AttrType
+
+# Conversions of MDF parameter values to the values expected by helper.make_attribute, by ONNX attribute type
+_ATTRIBUTE_CASTS = {
+    AttrType.INT: int,
+    AttrType.FLOAT: float,
+    AttrType.STRING: str,
+    AttrType.INTS: lambda v: [int(i) for i in np.atleast_1d(v)],
+    AttrType.FLOATS: lambda v: [float(i) for i in np.atleast_1d(v)],
+    AttrType.STRINGS: lambda v: [str(i) for i in np.atleast_1d(v)],
+    AttrType.TENSOR: lambda v: numpy_helper.from_array(onnx_ops.convert_type(v)),
+}
+
+
+def _get_onnx_function(node: Node):
+    """Get the single ONNX function parameter of a node, raise a ValueError if there isn't one"""
+    if len(node.functions) > 0:
+        raise ValueError(
+            f"Node {node.id} uses MDF functions, only parameters with ONNX functions are supported"
+        )
+
+    funcs = [p for p in node.parameters if p.function is not None]
+    if len(funcs) != 1 or not funcs[0].function.startswith(ONNX_FUNCTION_PREFIX):
+        raise ValueError(
+            "Node %s must have exactly one parameter with an ONNX function, found: %s"
+            % (node.id, [p.function for p in funcs])
+        )
+
+    for p in node.parameters:
+        if p is not funcs[0] and (
+            p.value is None
+            or p.default_initial_value is not None
+            or p.time_derivative is not None
+            or p.conditions
+        ):
+            raise ValueError(
+                f"Parameter {p.id} of node {node.id} is not a constant value"
+            )
+
+    return funcs[0]
+
+
+def _make_attribute(name: str, value: typing.Any, attr_type) -> onnx.AttributeProto:
+    """Make an ONNX attribute from an MDF parameter value, casting it to the type the schema expects."""
+    try:
+        cast = _ATTRIBUTE_CASTS[attr_type]
+    except KeyError:
+        raise ValueError(f"Unsupported type {attr_type} for ONNX attribute {name}")
+
+    try:
+        return helper.make_attribute(name, cast(value))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Cannot convert {value} to ONNX attribute {name}: {e}")
+
+
+class OnnxGraphBackend:
+    r"""
+    Lowers a :class:`~modeci_mdf.mdf.Graph` whose nodes each consist of a single ONNX function (plus constant
+    parameters for its inputs and attributes) to one ONNX model, and runs this in a single onnxruntime session.
+
+    Input ports which receive no edge (see :attr:`~modeci_mdf.mdf.Graph.inputs`) become the inputs of the ONNX model,
+    and every output port of every node becomes one of its outputs. Output port :code:`i` of a node is bound to output
+    :code:`i` of its ONNX operator, as created by :func:`~modeci_mdf.interfaces.onnx.onnx_to_mdf`. A session is created
+    for each distinct set of input dtypes and shapes and reused on subsequent runs.
+
+    Args:
+        graph: The graph to lower.
+        opset_version: The ONNX opset to use.
+        dtype: If float32, the model is run with float32 values from the start and its float32 outputs are returned as
+            they are. Otherwise float32 outputs are returned as float64.
+
+    Raises:
+        ValueError: If the graph cannot be expressed as a single ONNX model, e.g. because it has conditions, weighted
+            edges or nodes that are not composed of a single ONNX function
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        opset_version: int = onnx_ops.onnx_opset_version,
+        dtype: typing.Optional[np.dtype] = None,
+    ):
+        self.graph = graph
+        self.opset_version = opset_version
+        self._keep_float32 = dtype == np.float32
+
+        if graph.conditions is not None and (
+            graph.conditions.node_specific or graph.conditions.termination
+        ):
+            raise ValueError(
+                f"Graph {graph.id} has conditions, which cannot be lowered to ONNX"
+            )
+
+        # ONNX tensor name for every output port
+        self.output_names = collections.OrderedDict()
+        for node in graph.nodes:
+            for op in node.output_ports:
+                self.output_names[(node.id, op.id)] = f"{node.id}.{op.id}"
+
+        # ONNX tensor name for every input port, either the tensor sent along its edge or an input of the model
+        self.input_names = {}
+        for edge in graph.edges:
+            if edge.parameters and edge.parameters.get("weight", 1) != 1:
+                raise ValueError(
+                    f"Edge {edge.id} has a weight, which cannot be lowered to ONNX"
+                )
+            receiver = (edge.receiver, edge.receiver_port)
+            if receiver in self.input_names:
+                raise ValueError(
+                    "Input port %s of node %s receives more than one edge"
+                    % (edge.receiver_port, edge.receiver)
+                )
+            self.input_names[receiver] = self.output_names[
+                (edge.sender, edge.sender_port)
+            ]
+
+        #: The graph inputs, as (node id, input port id) tuples, in the order the ONNX model takes them
+        self.graph_inputs = graph.inputs
+        for node_id, ip_id in self.graph_inputs:
+            self.input_names[(node_id, ip_id)] = f"{node_id}.{ip_id}"
+
+        # ONNX requires the nodes of a graph to be sorted topologically
+        self._onnx_nodes = []
+        self._initializers = collections.OrderedDict()
+        for node in graph.get_ordered_nodes():
+            self._onnx_nodes.append(self._lower_node(node))
+
+        self._sessions = collections.OrderedDict()
+        self._float32 = self._keep_float32
+
+    def _lower_node(self, node: Node) -> onnx.NodeProto:
+        """Create the ONNX node for an MDF node, collecting the constant parameters it uses as initializers"""
+        func = _get_onnx_function(node)
+        op_name = func.function[len(ONNX_FUNCTION_PREFIX) :]
+        schema = onnx_ops.get_onnx_schema(op_name.lower(), self.opset_version)
+
+        port_ids = {ip.id for ip in node.input_ports}
+        params = {p.id: p for p in node.parameters if p is not func}
+        args = func.args if func.args is not None else {}
+
+        def resolve(arg_expr):
+            if type(arg_expr) == str and arg_expr[0] == "[" and arg_expr[-1] == "]":
+                arg_expr_list = parse_str_as_list(arg_expr)
+                if type(arg_expr_list) != list:
+                    arg_expr_list = [arg_expr_list]
+                return [name for a in arg_expr_list for name in resolve(a)]
+            if arg_expr in port_ids:
+                return [self.input_names[(node.id, arg_expr)]]
+            if arg_expr in params and not isinstance(params[arg_expr].value, str):
+                name = f"{node.id}.{arg_expr}"
+                # Evaluated as the execution engine does, which e.g. turns 1.0 into 1
+                self._initializers[name] = onnx_ops.convert_type(
+                    evaluate_expr(params[arg_expr].value, {})
+                )
+                return [name]
+            raise ValueError(
+                "Argument %s of %s in node %s is neither an input port nor a constant parameter"
+                % (arg_expr, func.id, node.id)
+            )
+
+        schema_input_names = [inp.name for inp in schema.inputs]
+        input_names = []
+        for inp in schema.inputs:
+            if inp.option == onnx.defs.OpSchema.FormalParameterOption.Variadic:
+                # The variadic input takes a list of arguments under its own name, followed by any arguments not
+                # named after an input or attribute of the schema (e.g. arg_<input name> from onnx_to_mdf)
+                if inp.name in args:
+                    input_names.extend(resolve(args[inp.name]))
+                for kw, arg_expr in args.items():
+                    if kw not in schema_input_names and kw not in schema.attributes:
+                        input_names.extend(resolve(arg_expr))
+                break
+            elif inp.name in args:
+                input_names.extend(resolve(args[inp.name]))
+            else:
+                # An omitted optional input
+                input_names.append("")
+
+        # Trailing omitted optional inputs can just be left out
+        while len(input_names) > 0 and input_names[-1] == "":
+            input_names.pop()
+
+        attributes = [
+            _make_attribute(a, params[a].value, schema.attributes[a].type)
+            for a in schema.attributes
+            if a in params
+        ]
+
+        if len(node.output_ports) > len(schema.outputs) and not (
+            len(schema.outputs) > 0
+            and schema.outputs[-1].option
+            == onnx.defs.OpSchema.FormalParameterOption.Variadic
+        ):
+            raise ValueError(
+                f"Node {node.id} has more output ports than {op_name} has outputs"
+            )
+
+        onnx_node = helper.make_node(
+            op_name,
+            input_names,
+            [self.output_names[(node.id, op.id)] for op in node.output_ports],
+            name=node.id,
+        )
+        onnx_node.attribute.extend(attributes)
+
+        return onnx_node
+
+    def to_onnx(self, inputs: typing.Dict[str, np.ndarray]) -> onnx.ModelProto:
+        """
+        Create the ONNX model for the graph, with inputs typed after the given values.
+
+        Args:
+            inputs: Values for the inputs of the ONNX model, keyed by tensor name
+
+        Returns:
+            The ONNX model.
+        """
+        initializers = [
+            numpy_helper.from_array(self._cast(v), name)
+            for name, v in self._initializers.items()
+        ]
+        graph_inputs = [
+            helper.make_tensor_value_info(
+                name, onnx.mapping.NP_TYPE_TO_TENSOR_TYPE[v.dtype], v.shape
+            )
+            for name, v in inputs.items()
+        ]
+        graph_outputs = [
+            helper.make_empty_tensor_value_info(name)
+            for name in self.output_names.values()
+        ]
+
+        onnx_graph = helper.make_graph(
+            self._onnx_nodes, self.graph.id, graph_inputs, graph_outputs, initializers
+        )
+        return helper.make_model(
+            onnx_graph, opset_imports=[helper.make_opsetid("", self.opset_version)]
+        )
+
+    def _cast(self, v: np.ndarray) -> np.ndarray:
+        if self._float32 and v.dtype == np.float64:
+            return v.astype(np.float32)
+        return v
+
+    def _get_session(self, inputs: typing.Dict[str, np.ndarray]):
+        import onnxruntime as ort
+
+        key = tuple((v.dtype.str, v.shape) for v in inputs.values())
+        sess = self._sessions.get(key)
+        if sess is None:
+            sess = ort.InferenceSession(self.to_onnx(inputs).SerializeToString())
+            self._sessions[key] = sess
+            while len(self._sessions) > ONNX_GRAPH_SESSION_CACHE_SIZE:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(key)
+
+        return sess
+
+    def run(
+        self, input_values: typing.Dict[typing.Tuple[str, str], typing.Any]
+    ) -> typing.Dict[typing.Tuple[str, str], np.ndarray]:
+        """
+        Run the fused ONNX model.
+
+        Args:
+            input_values: Values for :attr:`graph_inputs`, keyed by (node id, input port id)
+
+        Returns:
+            The values of all output ports, keyed by (node id, output port id)
+        """
+        import onnxruntime
+
+        values = {
+            self.input_names[key]: onnx_ops.convert_type(input_values[key])
+            for key in self.graph_inputs
+        }
+
+        try:
+            inputs = {k: self._cast(v) for k, v in values.items()}
+            results = self._get_session(inputs).run(None, inputs)
+        except (
+            onnxruntime.capi.onnxruntime_pybind11_state.NotImplemented,
+            onnxruntime.capi.onnxruntime_pybind11_state.Fail,
+            onnxruntime.capi.onnxruntime_pybind11_state.InvalidGraph,
+        ) as e:
+            err = str(e)
+            if self._float32 or (
+                "bound to different types" not in err
+                and "Could not find an implementation for" not in err
+            ):
+                raise
+
+            # As for single operators, assume this is related to mixing float32 and float64 values, or lack of support
+            # for float64/double for some operators on the onnx CPUExecutionProvider, and run the whole graph in
+            # float32 from now on.
+            self._float32 = True
+            self._sessions.clear()
+            inputs = {k: self._cast(v) for k, v in values.items()}
+            results = self._get_session(inputs).run(None, inputs)
+
+        return {
+            key: r.astype(np.float64)
+            if r.dtype == np.float32 and not self._keep_float32
+            else r
+            for key, r in zip(self.output_names, results)
+        }
@@ -5,7 +5,6 @@ Code for exporting MDF models to ONNX.
 import re
 
 from modeci_mdf.utils import load_mdf
-from modeci_mdf.execution_engine import EvaluableGraph
 
 import onnx
 from onnx import helper, shape_inference
@@ -29,12 +28,7 @@ def mdf_to_onnx(mdf_model):
         print("Processing Graph ", graph.id)
 
         # Use edges and nodes to construct execution order
-        nodenames_in_execution_order = []
-        evaluable_graph = EvaluableGraph(graph, verbose=False)
-        for idx, edge in enumerate(evaluable_graph.ordered_edges):
-            if idx == 0:
-                nodenames_in_execution_order.append(edge.sender)
-            nodenames_in_execution_order.append(edge.receiver)
+        nodenames_in_execution_order = [node.id for node in graph.get_ordered_nodes()]
 
         # print(nodenames_in_execution_order, graph.nodes, graph.edges)
 
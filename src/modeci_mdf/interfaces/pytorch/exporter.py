@@ -329,18 +329,15 @@ def _generate_scripts_from_json(model_input):
 
         evaluable_graph = EvaluableGraph(graph, verbose=False)
         enodes = evaluable_graph.enodes
-        edges = evaluable_graph.ordered_edges
         try:
             conditions = evaluable_graph.conditions
         except AttributeError:
             conditions = {}
 
         # Use edges and nodes to construct execution order
-        execution_order = []
-        for idx, edge in enumerate(edges):
-            if idx == 0:
-                execution_order.append(edge.sender)
-            execution_order.append(edge.receiver)
+        execution_order = [
+            node.id for node in graph.get_ordered_nodes(allow_cycles=True)
+        ]
 
         # Build script
         script = build_script(nodes, execution_order, conditions=conditions)
@@ -7,8 +7,6 @@ r"""
 """
 
 import collections
-import onnx.defs
-import sympy
 
 from typing import List, Tuple, Dict, Optional, Set, Any, Union, Optional
 
@@ -30,6 +28,49 @@ __all__ = [
 ]
 
 
+def _get_by_id(owner: Base, index_name: str, elements: List[Any], element_id: Any):
+    """
+    Get the first element of **elements** (a list of children of **owner**) with id **element_id**, or :code:`None`.
+
+    Rather than scanning the list on every call, a map from ids to positions is cached on **owner** under
+    **index_name**. This is rebuilt whenever the list is replaced or its length changes (e.g. as elements are appended),
+    or if the element found at the cached position no longer has the requested id. Only ids which are not in the index
+    fall back to a scan of the list, in case an element was replaced or renamed in place.
+    """
+    index = owner.__dict__.get(index_name)
+    if index is None or index[0] is not elements or index[1] != len(elements):
+        positions = {}
+        for i, element in enumerate(elements):
+            try:
+                positions.setdefault(element.id, i)
+            except TypeError:
+                pass
+        index = (elements, len(elements), positions)
+        # Set directly, so this isn't handled as a field of the modelspec object
+        owner.__dict__[index_name] = index
+
+    try:
+        i = index[2].get(element_id)
+    except TypeError:
+        # Unhashable, so can't be the id of an element
+        return None
+
+    if i is None:
+        for element in elements:
+            if element.id == element_id:
+                del owner.__dict__[index_name]
+                return element
+        return None
+
+    element = elements[i]
+    if element.id != element_id:
+        # Replaced or renamed in place, rebuild the index
+        del owner.__dict__[index_name]
+        return _get_by_id(owner, index_name, elements, element_id)
+
+    return element
+
+
 class MdfBaseWithId(BaseWithId):
     """Override BaseWithId from modelspec"""
 
@@ -243,7 +284,8 @@ class Graph(MdfBaseWithId):
         return self.__getattr__("edges")
 
     def get_node(self, id: str) -> "Node":
-        """Retrieve Node object corresponding to the given id
+        """Retrieve Node object corresponding to the given id. Nodes are looked up through an index of their ids, which
+        is kept up to date as nodes are added to the graph.
 
         Args:
             id: Unique identifier of Node object
@@ -251,9 +293,92 @@ class Graph(MdfBaseWithId):
         Returns:
             Node object if the entered id matches with the id of Node present in the Graph
         """
-        for node in self.nodes:
-            if id == node.id:
-                return node
+        return _get_by_id(self, "_node_index", self.nodes, id)
+
+    def get_edge(self, id: str) -> "Edge":
+        """Retrieve Edge object corresponding to the given id, see :func:`get_node`
+
+        Args:
+            id: Unique identifier of Edge object
+
+        Returns:
+            Edge object if the entered id matches with the id of Edge present in the Graph
+        """
+        return _get_by_id(self, "_edge_index", self.edges, id)
+
+    def get_ordered_nodes(self, allow_cycles: bool = False) -> List["Node"]:
+        """Order the nodes of the graph topologically, so that every node comes after the senders of all of its
+        incoming edges. This uses Kahn's algorithm, so takes time linear in the number of nodes and edges, starting
+        from the nodes without incoming edges in the order they appear in the graph.
+
+        Args:
+            allow_cycles: If False, a ValueError is raised if the edges of the graph contain a cycle. If True, cycles are
+                broken by continuing with the first remaining node (preferring nodes which receive an edge from a node
+                already ordered), and the edges which close a cycle point backwards in the order.
+
+        Returns:
+            The list of nodes in execution order
+        """
+        position = {}
+        for i, node in enumerate(self.nodes):
+            position.setdefault(node.id, i)
+
+        successors = [[] for node in self.nodes]
+        in_degree = [0 for node in self.nodes]
+        for edge in self.edges:
+            for node_id in (edge.sender, edge.receiver):
+                if node_id not in position:
+                    raise ValueError(
+                        "Edge %s refers to node %s, which is not in graph %s"
+                        % (edge.id, node_id, self.id)
+                    )
+            successors[position[edge.sender]].append(position[edge.receiver])
+            in_degree[position[edge.receiver]] += 1
+
+        ordered = []
+        done = [False for node in self.nodes]
+        reached = [False for node in self.nodes]
+        ready = collections.deque(i for i, d in enumerate(in_degree) if d == 0)
+
+        while len(ordered) < len(self.nodes):
+            if len(ready) == 0:
+                remaining = [i for i, d in enumerate(done) if not d]
+                if not allow_cycles:
+                    raise ValueError(
+                        "Graph %s contains a cycle between the nodes: %s"
+                        % (self.id, [self.nodes[i].id for i in remaining])
+                    )
+                ready.append(next((i for i in remaining if reached[i]), remaining[0]))
+
+            i = ready.popleft()
+            if done[i]:
+                continue
+            done[i] = True
+            ordered.append(self.nodes[i])
+
+            for j in successors[i]:
+                reached[j] = True
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    ready.append(j)
+
+        return ordered
+
+    def get_ordered_edges(self, allow_cycles: bool = False) -> List["Edge"]:
+        """Order the edges of the graph by the position of their senders in :func:`get_ordered_nodes`, so that the
+        edges into a node come before the edges out of it.
+
+        Args:
+            allow_cycles: See :func:`get_ordered_nodes`
+
+        Returns:
+            The list of edges in execution order
+        """
+        position = {
+            node.id: i
+            for i, node in enumerate(self.get_ordered_nodes(allow_cycles=allow_cycles))
+        }
+        return sorted(self.edges, key=lambda edge: position[edge.sender])
 
     @property
     def dependency_dict(self) -> Dict["Node", Set["Node"]]:
@@ -353,10 +478,7 @@ class Node(MdfBaseWithId):
         Returns:
             The :class:`Parameter` object stored on this node.
         """
-        for p in self.parameters:
-            if p.id == id:
-                return p
-        return None
+        return _get_by_id(self, "_parameter_index", self.parameters, id)
 
     @property
     def input_ports(self) -> List["InputPort"]:
@@ -568,32 +690,14 @@ class Parameter(MdfBaseWithId):
         Returns:
             :code:`True` if stateful, `False` if not.
         """
-        from modeci_mdf.execution_engine import parse_str_as_list
+        from modeci_mdf.utils import get_expression_symbols
 
         if self.time_derivative is not None:
             return True
         if self.default_initial_value is not None:
             return True
         if self.value is not None and type(self.value) == str:
-            # If we are dealing with a list of symbols, each must treated separately
-            if self.value[0] == "[" and self.value[-1] == "]":
-                # Use the Python interpreter to parse this into a List[str]
-                arg_expr_list = parse_str_as_list(self.value)
-            else:
-                arg_expr_list = [self.value]
-
-            req_vars = []
-
-            for e in arg_expr_list:
-                param_expr = sympy.simplify(e)
-                req_vars.extend([str(s) for s in param_expr.free_symbols])
-            sf = self.id in req_vars
-            """
-            print(
-                "Checking whether %s is stateful, %s: %s"
-                % (self, param_expr.free_symbols, sf)
-            )"""
-            return sf
+            return self.id in get_expression_symbols(self.value)
         return False
 
 
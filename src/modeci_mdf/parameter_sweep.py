@@ -0,0 +1,193 @@
+"""
+Evaluating an MDF model for many sets of parameter values in parallel, on a pool of worker processes.
+
+The model is sent to each worker process once, when the process starts, and each worker builds a single
+:class:`~modeci_mdf.execution_engine.EvaluableGraph` from it. Every point of the sweep then only sets new parameter
+values on this graph (see :func:`~modeci_mdf.execution_engine.EvaluableGraph.set_parameter_value`), resets it and
+evaluates it, rather than building a new graph.
+"""
+import concurrent.futures
+import itertools
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+__all__ = ["sweep"]
+
+# The _SweepWorker of this process, created by _init_worker when a worker process of sweep starts
+_worker = None
+
+
+def _find_id(
+    graph: "Graph",
+    key: Union[str, Tuple[str, str]],
+    get_ids: Callable[["Node"], List[str]],
+    kind: str,
+) -> Tuple[str, str]:
+    """
+    Find the node id and the parameter or port id of a :code:`'node_id.id'` string (or a (node id, id) pair), among
+    the ids **get_ids** returns for each node of **graph**.
+    """
+    if isinstance(key, str):
+        # Node ids may contain dots too, so find the node by trying each split
+        parts = key.split(".")
+        candidates = [
+            (".".join(parts[:i]), ".".join(parts[i:])) for i in range(1, len(parts))
+        ]
+    else:
+        candidates = [tuple(key)]
+
+    for node_id, id in candidates:
+        node = graph.get_node(node_id)
+        if node is not None and id in get_ids(node):
+            return node_id, id
+
+    raise ValueError(f"Graph {graph.id} has no {kind} {key}")
+
+
+class _SweepWorker:
+    """The graph built once in a worker process of :func:`sweep`, and the settings for evaluating each point on it"""
+
+    def __init__(
+        self,
+        model: "Model",
+        graph_id: str,
+        parameter_ids: List[Tuple[str, str]],
+        output_ids: List[Tuple[str, str]],
+        time_increment: Optional[Union[int, float]],
+        initializer: Optional[Dict[str, Any]],
+        graph_options: Dict[str, Any],
+    ):
+        from modeci_mdf.execution_engine import EvaluableGraph
+
+        graph = [g for g in model.graphs if g.id == graph_id][0]
+        self.egraph = EvaluableGraph(graph, **graph_options)
+        self.parameter_ids = parameter_ids
+        self.output_ids = output_ids
+        self.time_increment = time_increment
+        self.initializer = initializer
+
+    def evaluate(self, values: Sequence[Any]) -> List[np.ndarray]:
+        self.egraph.reset()
+        for (node_id, parameter_id), value in zip(self.parameter_ids, values):
+            self.egraph.set_parameter_value(node_id, parameter_id, value)
+
+        self.egraph.evaluate(
+            time_increment=self.time_increment, initializer=self.initializer
+        )
+
+        # Copied, as the arrays may be overwritten by the next evaluation with reuse_buffers
+        return [
+            np.array(self.egraph.enodes[node_id].evaluable_outputs[port_id].curr_value)
+            for node_id, port_id in self.output_ids
+        ]
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = _SweepWorker(*args)
+
+
+def _evaluate_point(values: Sequence[Any]) -> List[np.ndarray]:
+    return _worker.evaluate(values)
+
+
+def sweep(
+    model: "Model",
+    param_grid: Union[Dict[str, Sequence[Any]], Sequence[Dict[str, Any]]],
+    outputs: Sequence[str],
+    workers: Optional[int] = None,
+    graph_id: Optional[str] = None,
+    time_increment: Optional[Union[int, float]] = None,
+    initializer: Optional[Dict[str, Any]] = None,
+    chunksize: Optional[int] = None,
+    **graph_options,
+) -> np.ndarray:
+    r"""
+    Evaluate a graph of a model for every point of a grid of parameter values, on a pool of worker processes.
+
+    Each worker process builds one :class:`~modeci_mdf.execution_engine.EvaluableGraph` and evaluates all the points it
+    is sent on it, in turn. The graph is reset to its initial conditions (see
+    :func:`~modeci_mdf.execution_engine.EvaluableGraph.reset`) before each point, which is then evaluated once (or for
+    one time step, with **time_increment**).
+
+    Args:
+        model: The model
+        param_grid: Either a dict of lists of values, keyed by :code:`'node_id.parameter_id'`, to evaluate every
+            combination of these values, or a list of dicts of single values (all with the same keys), to evaluate
+            just these points
+        outputs: The output ports to collect, as :code:`'node_id.output_port_id'`
+        workers: The number of worker processes, by default the number of CPUs
+        graph_id: The id of the graph to evaluate, by default the first graph of the model
+        time_increment: Passed to :func:`~modeci_mdf.execution_engine.EvaluableGraph.evaluate` for every point
+        initializer: Values for the graph inputs, passed to :func:`~modeci_mdf.execution_engine.EvaluableGraph.evaluate`
+            for every point
+        chunksize: The number of points sent to a worker at a time, by default enough for each worker to get about 4
+            chunks
+        graph_options: Keyword arguments for :class:`~modeci_mdf.execution_engine.EvaluableGraph`, e.g.
+            :code:`compiled=True`
+
+    Returns:
+        The values of the outputs, stacked into one array. For a dict **param_grid**, it has one dimension for each of
+        its keys, in order, followed by one for the outputs, followed by the shape of their values, which must all be
+        the same. For a list of points, it has a single dimension for these instead.
+
+    Raises:
+        ValueError: If **param_grid** has no points, or refers to a parameter or output port that isn't in the graph
+    """
+    if isinstance(param_grid, dict):
+        parameter_keys = list(param_grid)
+        grid_shape = tuple(len(values) for values in param_grid.values())
+        points = list(itertools.product(*param_grid.values()))
+    else:
+        parameter_keys = list(param_grid[0]) if len(param_grid) > 0 else []
+        grid_shape = (len(param_grid),)
+        points = [tuple(point[key] for key in parameter_keys) for point in param_grid]
+
+    if len(points) == 0:
+        raise ValueError("param_grid has no points to evaluate")
+
+    if graph_id is None:
+        graph = model.graphs[0]
+    else:
+        graphs = [g for g in model.graphs if g.id == graph_id]
+        if len(graphs) == 0:
+            raise ValueError(f"Model {model.id} has no graph {graph_id}")
+        graph = graphs[0]
+
+    parameter_ids = [
+        _find_id(graph, key, lambda node: [p.id for p in node.parameters], "parameter")
+        for key in parameter_keys
+    ]
+    output_ids = [
+        _find_id(
+            graph, key, lambda node: [op.id for op in node.output_ports], "output port"
+        )
+        for key in outputs
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(points) / (4 * workers)))
+
+    graph_options.setdefault("verbose", False)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            model,
+            graph.id,
+            parameter_ids,
+            output_ids,
+            time_increment,
+            initializer,
+            graph_options,
+        ),
+    ) as executor:
+        results = list(executor.map(_evaluate_point, points, chunksize=chunksize))
+
+    stacked = np.array(results)
+    return stacked.reshape(grid_shape + stacked.shape[1:])
@@ -0,0 +1,179 @@
+"""
+Opt-in profiling of MDF graph execution, enabled with :code:`EvaluableGraph(graph, profile=True)`.
+
+The :class:`Profiler` wraps the :code:`evaluate` methods of the evaluable nodes, parameters, functions, output ports
+and edges of an :class:`~modeci_mdf.execution_engine.EvaluableGraph` when the graph is created, so nothing changes (and
+nothing is measured) for graphs created without profiling. For each of these it records the number of calls, the
+cumulative wall time, the number of expression evaluations and ONNX operator (onnxruntime session) runs, and the total
+size of the arrays produced.
+"""
+import functools
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+__all__ = ["Profiler"]
+
+
+class _ProfileRecord:
+    """The counters for one node, parameter, function, output port or edge"""
+
+    __slots__ = ["calls", "time", "expr_evaluations", "onnx_calls", "bytes"]
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+        self.expr_evaluations = 0
+        self.onnx_calls = 0
+        self.bytes = 0
+
+
+def _nbytes(value: Any) -> int:
+    """The size of the data of an array (numpy array or tensor), 0 for other values"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "element_size") and hasattr(value, "nelement"):
+        return value.element_size() * value.nelement()
+    return 0
+
+
+class Profiler:
+    """
+    Records call counts, cumulative wall time, expression evaluations, ONNX operator runs and the size of the arrays
+    produced, for every node of an :class:`~modeci_mdf.execution_engine.EvaluableGraph`, and every parameter, function,
+    output port and edge in it.
+
+    The time recorded for a node includes that of its parameters, functions and output ports, but not that of the
+    edges into it. Expression evaluations and ONNX operator runs are only counted for the parameter, function or output
+    port they are made for.
+    """
+
+    def __init__(self):
+        #: The counters, keyed by (node id, kind, id), where kind is one of 'node', 'parameter', 'function',
+        #: 'output_port' or 'edge'. The node id of an edge is that of its receiver. Graphs evaluated with the onnx
+        #: backend have a single record of kind 'graph' instead, with a node id of None.
+        self.records = {}
+
+    def _get_record(self, node_id: str, kind: str, id: str) -> _ProfileRecord:
+        key = (node_id, kind, id)
+        if key not in self.records:
+            self.records[key] = _ProfileRecord()
+        return self.records[key]
+
+    @staticmethod
+    def _timed(record: _ProfileRecord, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            value = method(*args, **kwargs)
+            record.time += time.perf_counter() - start
+            record.calls += 1
+            record.bytes += _nbytes(value)
+            return value
+
+        return timed
+
+    @staticmethod
+    def _counted(record: _ProfileRecord, counter: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def counted(*args, **kwargs):
+            setattr(record, counter, getattr(record, counter) + 1)
+            return method(*args, **kwargs)
+
+        return counted
+
+    def _instrument_evaluable(self, evaluable: Any, node_id: str, kind: str, id: str):
+        record = self._get_record(node_id, kind, id)
+        evaluable.evaluate = self._timed(record, evaluable.evaluate)
+
+        if hasattr(evaluable, "_evaluate_expr"):
+            evaluable._evaluate_expr = self._counted(
+                record, "expr_evaluations", evaluable._evaluate_expr
+            )
+
+        call = getattr(evaluable, "_call", None)
+        if call is not None and call.onnx_call is not None:
+            # evaluate_torch goes through evaluate for operators without a torch module, which are only counted once
+            call.onnx_call.evaluate = self._counted(
+                record, "onnx_calls", call.onnx_call.evaluate
+            )
+
+    def instrument(self, egraph: "EvaluableGraph"):
+        """
+        Wrap the evaluate methods of all nodes, parameters, functions, output ports and edges of a graph so that they
+        are recorded. This is called by :class:`~modeci_mdf.execution_engine.EvaluableGraph` when it is created with
+        :code:`profile=True`.
+
+        Args:
+            egraph: The graph to profile
+        """
+        for node_id, en in egraph.enodes.items():
+            self._instrument_evaluable(en, node_id, "node", node_id)
+            for ep_id, ep in en.evaluable_parameters.items():
+                self._instrument_evaluable(ep, node_id, "parameter", ep_id)
+            for ef_id, ef in en.evaluable_functions.items():
+                self._instrument_evaluable(ef, node_id, "function", ef_id)
+            for eop_id, eop in en.evaluable_outputs.items():
+                self._instrument_evaluable(eop, node_id, "output_port", eop_id)
+
+        for transfer in egraph.edge_transfers.values():
+            record = self._get_record(transfer.edge.receiver, "edge", transfer.edge.id)
+            transfer.transfer = self._timed(record, transfer.transfer)
+
+        if getattr(egraph, "onnx_backend", None) is not None:
+            record = self._get_record(None, "graph", egraph.graph.id)
+            egraph.onnx_backend.run = self._counted(
+                record, "onnx_calls", self._timed(record, egraph.onnx_backend.run)
+            )
+
+    def reset(self):
+        """Set all counters back to 0"""
+        for key in self.records:
+            self.records[key] = _ProfileRecord()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        The counters as a list of rows, one for each node, parameter, function, output port and edge, sorted by
+        decreasing cumulative time. This can be passed straight to :code:`pandas.DataFrame`.
+
+        Returns:
+            A list of dicts with the keys 'node', 'kind', 'id', 'calls', 'time' (the cumulative wall time in seconds),
+            'time_per_call', 'expr_evaluations', 'onnx_calls' and 'bytes' (the total size of the arrays produced)
+        """
+        rows = []
+        for (node_id, kind, id), record in self.records.items():
+            rows.append(
+                {
+                    "node": node_id,
+                    "kind": kind,
+                    "id": id,
+                    "calls": record.calls,
+                    "time": record.time,
+                    "time_per_call": record.time / record.calls
+                    if record.calls > 0
+                    else 0.0,
+                    "expr_evaluations": record.expr_evaluations,
+                    "onnx_calls": record.onnx_calls,
+                    "bytes": record.bytes,
+                }
+            )
+
+        return sorted(rows, key=lambda row: row["time"], reverse=True)
+
+    def to_json(self, filename: Optional[str] = None) -> str:
+        """
+        Export the :func:`report` as JSON.
+
+        Args:
+            filename: If given, the JSON is also written to this file
+
+        Returns:
+            The JSON string
+        """
+        s = json.dumps(self.report(), indent=4)
+        if filename is not None:
+            with open(filename, "w") as f:
+                f.write(s)
+        return s
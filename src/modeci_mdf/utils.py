@@ -2,8 +2,19 @@
     Useful utility functions for dealing with MDF objects.
 """
 
+import ast
+import functools
+
+from typing import Any, Tuple
+
 from modeci_mdf.mdf import Model, Graph, Node, Edge, OutputPort, Function, InputPort
 
+# Maximum number of distinct expressions kept in the cache of get_expression_symbols
+EXPRESSION_SYMBOLS_CACHE_SIZE = 10000
+
+# Modules available to expressions when they are evaluated, which are not variables of the expressions
+EXPRESSION_MODULES = ("math", "numpy", "onnx_ops", "actr")
+
 
 def create_example_node(node_id: str, graph: Graph) -> Node:
     """
@@ -141,3 +152,74 @@ def is_number(s):
         return True
     except (TypeError, ValueError):
         return False
+
+
+@functools.lru_cache(maxsize=EXPRESSION_SYMBOLS_CACHE_SIZE)
+def _get_str_expression_symbols(expr: str) -> Tuple[str, ...]:
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError:
+        # Not valid Python, see if sympy can make sense of it
+        import sympy
+
+        return tuple(sorted(str(s) for s in sympy.sympify(expr).free_symbols))
+
+    # Names of called functions and modules (e.g. math in math.exp(x)) are not variables of the expression, but the
+    # values of other attributes are (e.g. x in x.T or x.shape[0])
+    not_symbols = set()
+    for n in ast.walk(tree):
+        if isinstance(n, ast.Call) and isinstance(n.func, ast.Name):
+            not_symbols.add(n.func)
+        elif (
+            isinstance(n, ast.Attribute)
+            and isinstance(n.value, ast.Name)
+            and n.value.id in EXPRESSION_MODULES
+        ):
+            not_symbols.add(n.value)
+
+    symbols = {
+        n.id for n in ast.walk(tree) if isinstance(n, ast.Name) and n not in not_symbols
+    }
+    return tuple(sorted(symbols))
+
+
+@functools.lru_cache(maxsize=EXPRESSION_SYMBOLS_CACHE_SIZE)
+def expression_has_calls(expr: str) -> bool:
+    """
+    Does a (str) expression call any functions, e.g. :code:`random()` or :code:`math.exp(a)`? The value of such an
+    expression may change between evaluations even if the values of its variables don't. Expressions which aren't
+    valid Python are assumed to.
+
+    Args:
+        expr: The expression
+
+    Returns:
+        True if **expr** contains a function call
+    """
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError:
+        return True
+
+    return any(isinstance(n, ast.Call) for n in ast.walk(tree))
+
+
+def get_expression_symbols(expr: Any) -> Tuple[str, ...]:
+    """
+    Get the names of the variables an expression depends on, e.g. :code:`('a', 'b')` for :code:`'a * math.exp(-b)'`
+    or :code:`'[a, b]'`. Expressions are parsed with Python's :mod:`ast` module, which is much faster than
+    :code:`sympy`, falling back to :code:`sympy` for expressions which aren't valid Python. Results are cached, so
+    repeated analysis of the same expression is cheap.
+
+    Args:
+        expr: The expression, either a string or a :code:`sympy` expression. Anything else (e.g. a number) has no
+            symbols.
+
+    Returns:
+        The sorted names of the free symbols of **expr**
+    """
+    if type(expr) != str:
+        if hasattr(expr, "free_symbols"):
+            return tuple(sorted(str(s) for s in expr.free_symbols))
+        return ()
+    return _get_str_expression_symbols(expr)
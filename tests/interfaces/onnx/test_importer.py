@@ -87,6 +87,65 @@ def test_abc():
     #    assert onnx.checker.check_model(onnx_model) is None
 
 
+def test_onnx_backend():
+    base_path = Path(__file__).parent
+
+    # The constant parameters of ab.json are ints, so its inputs must be too (see test_ab)
+    for filename, dtype in [
+        ("examples/ONNX/ab.json", np.int64),
+        ("examples/ONNX/abc_basic-mdf.json", np.float64),
+    ]:
+        file_path = (base_path / "../../.." / filename).resolve()
+        mdf_model = load_mdf(str(file_path))
+
+        test_input = np.array([[0, 0, 0], [1, 1, 1]], dtype=dtype)
+
+        # Evaluate node by node, and as a single fused ONNX model
+        mdf_executable = EvaluableGraph(mdf_model.graphs[0], verbose=False)
+        mdf_executable.evaluate(initializer={"input": test_input})
+
+        onnx_executable = EvaluableGraph(
+            mdf_model.graphs[0], verbose=False, backend="onnx"
+        )
+        for i in range(2):
+            onnx_executable.evaluate(initializer={"input": test_input + i})
+
+        mdf_executable.evaluate(initializer={"input": test_input + 1})
+
+        for node_id, en in mdf_executable.enodes.items():
+            for op_id, eop in en.evaluable_outputs.items():
+                onnx_value = (
+                    onnx_executable.enodes[node_id].evaluable_outputs[op_id].curr_value
+                )
+                assert np.allclose(eop.curr_value, onnx_value)
+
+
+def test_float32():
+    base_path = Path(__file__).parent
+
+    file_path = (base_path / "../../../examples/ONNX/abc_basic-mdf.json").resolve()
+    mdf_model = load_mdf(str(file_path))
+
+    test_input = np.array([[0, 0, 0], [1, 1, 1]], dtype=np.float64)
+
+    mdf_executable = EvaluableGraph(mdf_model.graphs[0], verbose=False)
+    mdf_executable.evaluate(initializer={"input": test_input})
+
+    for backend in ["mdf", "onnx"]:
+        executable = EvaluableGraph(
+            mdf_model.graphs[0], verbose=False, backend=backend, dtype=np.float32
+        )
+        executable.evaluate(initializer={"input": test_input})
+
+        for node_id, en in mdf_executable.enodes.items():
+            for op_id, eop in en.evaluable_outputs.items():
+                value = executable.enodes[node_id].evaluable_outputs[op_id].curr_value
+                assert value.dtype == np.float32
+                assert np.allclose(eop.curr_value, value)
+
+
 if __name__ == "__main__":
     test_ab()
     test_abc()
+    test_onnx_backend()
+    test_float32()
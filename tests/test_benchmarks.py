@@ -0,0 +1,129 @@
+"""
+Benchmarks for loading, building, evaluating and translating MDF models, using pytest-benchmark.
+
+These run once, as ordinary tests, with the default options (see setup.cfg). To time them, and save the results as a
+baseline in .benchmarks:
+
+    pytest tests/test_benchmarks.py --benchmark-enable --benchmark-autosave
+
+and to compare against the last saved baseline, failing on any benchmark whose mean time got more than 10% worse:
+
+    pytest tests/test_benchmarks.py --benchmark-enable --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Saved baselines can also be compared with each other with :code:`pytest-benchmark compare`.
+
+The benchmarks job in CI does both on every run, keeping the saved runs in .benchmarks in the GitHub Actions cache, so
+each run is compared against the last one saved on the same branch (or on the main branch, for a new branch). As
+timings on shared runners vary a lot, it only fails if the fastest round of a benchmark got more than 25% slower.
+"""
+import runpy
+
+import numpy as np
+import pytest
+
+from modeci_mdf.mdf import Model
+from modeci_mdf.utils import load_mdf
+from modeci_mdf.execution_engine import EvaluableGraph
+
+
+# (hidden layers, array size) of the graphs generated with examples/MDF/scaling.py
+SCALES = [(2, 2), (2, 32), (10, 2), (10, 32)]
+SCALE_IDS = ["%ilayers-%ix%i" % (layers, size, size) for layers, size in SCALES]
+
+
+def _generate_test_model(hidden_layers, size):
+    generate_test_model = runpy.run_path("examples/MDF/scaling.py")[
+        "generate_test_model"
+    ]
+    return generate_test_model(
+        "scaling_%i_%i" % (hidden_layers, size),
+        input_shape=(size, size),
+        hidden_shape=(size, size),
+        hidden_layers=hidden_layers,
+        output_shape=(size, size),
+        save_to_file=False,
+    )
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=SCALE_IDS)
+def scaling_graph(request):
+    return _generate_test_model(*request.param)
+
+
+@pytest.mark.parametrize("format", ["json", "yaml"])
+@pytest.mark.parametrize("scale", SCALES, ids=SCALE_IDS)
+def test_load_mdf(benchmark, tmp_path, format, scale):
+    benchmark.group = "load_mdf"
+
+    model = Model(id="scaling")
+    model.graphs.append(_generate_test_model(*scale))
+    filename = str(tmp_path / ("scaling.%s" % format))
+    if format == "json":
+        model.to_json_file(filename)
+    else:
+        model.to_yaml_file(filename)
+
+    loaded = benchmark(load_mdf, filename)
+    assert len(loaded.graphs[0].nodes) == len(model.graphs[0].nodes)
+
+
+def test_build(benchmark, scaling_graph):
+    benchmark.group = "build"
+
+    eg = benchmark(EvaluableGraph, scaling_graph, verbose=False)
+    assert len(eg.enodes) == len(scaling_graph.nodes)
+
+
+@pytest.mark.parametrize("compiled", [False, True], ids=["interpreted", "compiled"])
+def test_evaluate(benchmark, scaling_graph, compiled):
+    benchmark.group = "evaluate"
+
+    eg = EvaluableGraph(scaling_graph, verbose=False, compiled=compiled)
+    benchmark(eg.evaluate)
+
+    value = eg.enodes["output_node"].evaluable_outputs["out_port"].curr_value
+    assert np.all(np.isfinite(value))
+
+
+@pytest.mark.parametrize(
+    "filename", ["examples/ONNX/ab.json", "examples/ONNX/abc_basic-mdf.json"]
+)
+def test_mdf_to_onnx(benchmark, filename):
+    from modeci_mdf.interfaces.onnx import mdf_to_onnx
+
+    benchmark.group = "onnx"
+
+    model = load_mdf(filename)
+    onnx_models = benchmark(mdf_to_onnx, model)
+    assert len(onnx_models) > 0
+
+
+def test_onnx_to_mdf(benchmark):
+    import onnx
+    from modeci_mdf.interfaces.onnx import onnx_to_mdf
+
+    benchmark.group = "onnx"
+
+    onnx_model = onnx.load("examples/ONNX/ab_torch-jit-export-m2o.onnx")
+    model = benchmark(onnx_to_mdf, onnx_model)
+    assert len(model.graphs[0].nodes) > 0
+
+
+def test_pytorch_to_mdf(benchmark):
+    import torch
+    from modeci_mdf.interfaces.pytorch import pytorch_to_mdf
+
+    benchmark.group = "pytorch"
+
+    class Simple(torch.nn.Module):
+        def forward(self, x, y):
+            return torch.sin(x) + y
+
+    mdf_model, param_dict = benchmark(
+        pytorch_to_mdf,
+        model=Simple(),
+        args=(torch.tensor(0.0), torch.tensor(0.0)),
+        example_outputs=(torch.tensor(0.0)),
+        use_onnx_ops=True,
+    )
+    assert len(mdf_model.graphs[0].nodes) > 0
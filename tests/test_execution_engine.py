@@ -0,0 +1,769 @@
+"""
+Tests for the optional execution modes of the MDF execution engine.
+"""
+import pytest
+import numpy as np
+
+from modeci_mdf.mdf import Graph, Node, Edge, InputPort, OutputPort, Parameter
+from modeci_mdf.utils import load_mdf
+from modeci_mdf.execution_engine import EvaluableGraph, compile_expr, infer_shapes
+
+
+@pytest.mark.parametrize(
+    "expr, params, expected",
+    [
+        ("3", {}, 3),
+        ("1e-3", {}, 0.001),
+        ("a", {"a": 2.5}, 2.5),
+        ("a * b + 1", {"a": 2, "b": 3}, 7),
+        ("math.exp(a)", {"a": 0}, 1.0),
+        ("numpy.maximum(a, 0)", {"a": -2}, 0),
+    ],
+)
+def test_compile_expr(expr, params, expected):
+    assert compile_expr(expr)(params) == expected
+
+
+def test_compile_expr_params_unchanged():
+    params = {"a": 2, "b": np.array([1.0, 2.0])}
+    assert np.allclose(
+        compile_expr("math.exp(a) * numpy.sum(b)")(params), 3 * np.e ** 2
+    )
+    assert params.keys() == {"a", "b"}
+
+
+def test_compiled_state_output_not_aliased():
+    graph = Graph(id="decay")
+    node = Node(id="node")
+    node.parameters.append(
+        Parameter(id="x", default_initial_value=[1.0, 2.0], time_derivative="-x")
+    )
+    node.output_ports.append(OutputPort(id="out_port", value="x"))
+    graph.nodes.append(node)
+
+    recorded = {}
+    for compiled in [False, True]:
+        eg = EvaluableGraph(graph, verbose=False, compiled=compiled)
+        outputs = []
+        for i in range(4):
+            eg.evaluate(time_increment=None if i == 0 else 0.1)
+            outputs.append(eg.enodes["node"].evaluable_outputs["out_port"].curr_value)
+        recorded[compiled] = outputs
+
+    # The state is updated in place by each step, which must not change the outputs of earlier steps
+    assert np.allclose(recorded[True][0], [1.0, 2.0])
+    for interpreted, compiled in zip(recorded[False], recorded[True]):
+        assert np.allclose(interpreted, compiled)
+
+
+def test_compile_expr_unknown_variable():
+    with pytest.raises(Exception):
+        compile_expr("not_a_known_variable + 1")({})
+
+
+@pytest.mark.parametrize(
+    "filename, node, port",
+    [
+        ("examples/MDF/Simple.json", "processing_node", "output_1"),
+        ("examples/MDF/ABCD.json", "D", "output_1"),
+        ("examples/MDF/Arrays.json", "middle_node", "output_1"),
+    ],
+)
+def test_compiled_matches_interpreted(filename, node, port):
+    graph = load_mdf(filename).graphs[0]
+
+    eg = EvaluableGraph(graph, verbose=False)
+    eg.evaluate()
+    eg_compiled = EvaluableGraph(graph, verbose=False, compiled=True)
+    eg_compiled.evaluate()
+
+    assert np.allclose(
+        eg.enodes[node].evaluable_outputs[port].curr_value,
+        eg_compiled.enodes[node].evaluable_outputs[port].curr_value,
+    )
+
+
+def test_compiled_stateful():
+    graph = load_mdf("examples/MDF/States.json").graphs[0]
+
+    eg = EvaluableGraph(graph, verbose=False)
+    eg_compiled = EvaluableGraph(graph, verbose=False, compiled=True)
+
+    for i in range(20):
+        time_increment = None if i == 0 else 0.01
+        eg.evaluate(time_increment=time_increment)
+        eg_compiled.evaluate(time_increment=time_increment)
+
+        for node, port in [("counter_node", "out_port"), ("sine_node", "out_port")]:
+            assert np.allclose(
+                eg.enodes[node].evaluable_outputs[port].curr_value,
+                eg_compiled.enodes[node].evaluable_outputs[port].curr_value,
+            )
+
+
+def _batch_test_graph():
+    """Two nodes, the first scaling a graph input, the second receiving it over a weighted edge, and a constant node."""
+    graph = Graph(id="batch_test")
+
+    a = Node(id="A")
+    a.input_ports.append(InputPort(id="input", shape="(3,)"))
+    a.parameters.append(Parameter(id="slope", value=2))
+    a.parameters.append(
+        Parameter(
+            id="lin",
+            function="linear",
+            args={"variable0": "input", "slope": "slope", "intercept": 1},
+        )
+    )
+    a.output_ports.append(OutputPort(id="out_port", value="lin"))
+    graph.nodes.append(a)
+
+    b = Node(id="B")
+    b.input_ports.append(InputPort(id="in_port"))
+    b.parameters.append(Parameter(id="offset", value=[1.0, 2.0, 3.0]))
+    b.output_ports.append(OutputPort(id="out_port", value="in_port + offset"))
+    graph.nodes.append(b)
+
+    c = Node(id="C")
+    c.parameters.append(Parameter(id="offset", value=[1.0, 2.0, 3.0]))
+    c.output_ports.append(OutputPort(id="out_port", value="offset"))
+    graph.nodes.append(c)
+
+    graph.edges.append(
+        Edge(
+            id="a_b",
+            sender="A",
+            sender_port="out_port",
+            receiver="B",
+            receiver_port="in_port",
+            parameters={"weight": 0.5},
+        )
+    )
+    return graph
+
+
+def test_standard_function_dispatch():
+    node = Node(id="node")
+    node.parameters.append(Parameter(id="x", value=2))
+    node.parameters.append(
+        Parameter(
+            id="lin",
+            function="linear",
+            args={"variable0": "x", "slope": 3, "intercept": 1},
+        )
+    )
+    node.parameters.append(
+        Parameter(id="sine", function="sin", args={"variable0": "lin * 0", "scale": 2})
+    )
+    node.output_ports.append(OutputPort(id="out", value="lin + sine"))
+    graph = Graph(id="dispatch")
+    graph.nodes.append(node)
+
+    eg = EvaluableGraph(graph, verbose=False)
+    eg.evaluate()
+
+    assert eg.enodes["node"].evaluable_parameters["lin"].curr_value == 7
+    assert eg.enodes["node"].evaluable_parameters["sine"].curr_value == 0
+    assert eg.enodes["node"].evaluable_outputs["out"].curr_value == 7
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "examples/MDF/Simple.json",
+        "examples/MDF/ABCD.json",
+        "examples/MDF/Arrays.json",
+        "examples/MDF/States.json",
+    ],
+)
+def test_static_schedule(filename):
+    graph = load_mdf(filename).graphs[0]
+
+    eg = EvaluableGraph(graph, verbose=False)
+    assert eg.static_schedule is not None
+    eg_scheduler = EvaluableGraph(graph, verbose=False)
+    eg_scheduler.static_schedule = None
+
+    for i in range(3):
+        eg.evaluate(time_increment=None if i == 0 else 0.01)
+        eg_scheduler.evaluate(time_increment=None if i == 0 else 0.01)
+
+    for node_id, en in eg.enodes.items():
+        for op_id, eop in en.evaluable_outputs.items():
+            assert np.allclose(
+                eop.curr_value,
+                eg_scheduler.enodes[node_id].evaluable_outputs[op_id].curr_value,
+            )
+
+    graph = load_mdf("examples/MDF/abc_conditions.json").graphs[0]
+    assert EvaluableGraph(graph, verbose=False).static_schedule is None
+
+
+def test_reuse_buffers():
+    import runpy
+
+    generate_test_model = runpy.run_path("examples/MDF/scaling.py")[
+        "generate_test_model"
+    ]
+    graph = generate_test_model(
+        "reuse_test", input_shape=(5, 5), hidden_shape=(5, 5), save_to_file=False
+    )
+
+    eg = EvaluableGraph(graph, verbose=False)
+    eg_reuse = EvaluableGraph(graph, verbose=False, reuse_buffers=True)
+    # Preallocated from the inferred shapes
+    linear_call = eg_reuse.enodes["hidden_node_1"].get_function_calls()["linear_1"]
+    linear_buffer = linear_call.buffer
+    assert linear_buffer.shape == (5, 5)
+    for i in range(3):
+        eg.evaluate()
+        eg_reuse.evaluate()
+        out = eg_reuse.enodes["output_node"].evaluable_inputs["in_port"].curr_value
+        if i == 0:
+            first_out = out
+        assert out is first_out
+        assert (
+            eg_reuse.enodes["hidden_node_1"].evaluable_parameters["linear_1"].curr_value
+            is linear_buffer
+        )
+        assert np.allclose(
+            out, eg.enodes["output_node"].evaluable_inputs["in_port"].curr_value
+        )
+
+    # Preallocated with the dtype of the graph
+    eg_float32 = EvaluableGraph(
+        graph, verbose=False, reuse_buffers=True, dtype=np.float32
+    )
+    linear_call = eg_float32.enodes["hidden_node_1"].get_function_calls()["linear_1"]
+    linear_buffer = linear_call.buffer
+    assert linear_buffer.dtype == np.float32
+    for i in range(2):
+        eg_float32.evaluate()
+        assert (
+            eg_float32.enodes["hidden_node_1"]
+            .evaluable_parameters["linear_1"]
+            .curr_value
+            is linear_buffer
+        )
+
+
+def test_infer_shapes():
+    node = Node(id="node")
+    node.input_ports.append(InputPort(id="in_port", shape="(2, 3)"))
+    node.parameters.append(Parameter(id="slope", value=[1, 2, 3]))
+    node.parameters.append(
+        Parameter(
+            id="lin",
+            function="linear",
+            args={"variable0": "in_port", "slope": "slope", "intercept": 1},
+        )
+    )
+    node.output_ports.append(OutputPort(id="out", value="lin"))
+    node.output_ports.append(OutputPort(id="total", value="numpy.sum(lin)"))
+    graph = Graph(id="shapes")
+    graph.nodes.append(node)
+
+    shapes = infer_shapes(graph)
+    assert shapes[("node", "in_port")] == ((2, 3), np.float64)
+    assert shapes[("node", "slope")][0] == (3,)
+    assert shapes[("node", "lin")] == ((2, 3), np.float64)
+    assert shapes[("node", "out")] == ((2, 3), np.float64)
+    assert shapes[("node", "total")][0] == ()
+
+    # Inputs given explicitly
+    shapes = infer_shapes(graph, initializer={"in_port": np.zeros((4, 3), dtype=int)})
+    assert shapes[("node", "lin")] == ((4, 3), np.int64)
+
+    shapes = infer_shapes(graph, dtype=np.float32)
+    assert shapes[("node", "in_port")] == ((2, 3), np.float32)
+    assert shapes[("node", "lin")] == ((2, 3), np.float32)
+    assert shapes[("node", "out")] == ((2, 3), np.float32)
+
+
+def test_dtype():
+    import runpy
+
+    generate_test_model = runpy.run_path("examples/MDF/scaling.py")[
+        "generate_test_model"
+    ]
+    graph = generate_test_model("dtype_test", save_to_file=False)
+
+    eg = EvaluableGraph(graph, verbose=False)
+    eg_32 = EvaluableGraph(graph, verbose=False, dtype=np.float32)
+    eg.evaluate()
+    eg_32.evaluate()
+
+    assert (
+        eg_32.enodes["hidden_node_0"]
+        .evaluable_parameters["intercept0"]
+        .curr_value.dtype
+        == np.float32
+    )
+    for node_id, en in eg_32.enodes.items():
+        for op_id, eop in en.evaluable_outputs.items():
+            assert eop.curr_value.dtype == np.float32
+            assert np.allclose(
+                eop.curr_value,
+                eg.enodes[node_id].evaluable_outputs[op_id].curr_value,
+                rtol=1e-5,
+            )
+
+
+@pytest.mark.parametrize(
+    "filename",
+    ["examples/MDF/ABCD.json", "examples/MDF/Arrays.json", "examples/ONNX/ab.json"],
+)
+def test_torch_format(filename):
+    torch = pytest.importorskip("torch")
+
+    graph = load_mdf(filename).graphs[0]
+    initializer = {"input": np.array([[0, 0, 0], [1, 1, 1]])}
+
+    eg = EvaluableGraph(graph, verbose=False)
+    eg.evaluate(initializer=initializer)
+    eg_torch = EvaluableGraph(graph, verbose=False)
+    eg_torch.evaluate(array_format="torch", initializer=initializer)
+
+    for node_id, en in eg.enodes.items():
+        for op_id, eop in en.evaluable_outputs.items():
+            value = eg_torch.enodes[node_id].evaluable_outputs[op_id].curr_value
+            if isinstance(value, torch.Tensor):
+                value = value.numpy()
+            assert np.allclose(eop.curr_value, value)
+
+
+def test_torch_dtype():
+    torch = pytest.importorskip("torch")
+    import runpy
+
+    generate_test_model = runpy.run_path("examples/MDF/scaling.py")[
+        "generate_test_model"
+    ]
+    graph = generate_test_model("torch_dtype_test", save_to_file=False)
+
+    eg = EvaluableGraph(graph, verbose=False)
+    eg.evaluate()
+    eg_32 = EvaluableGraph(graph, verbose=False, dtype=np.float32)
+    eg_32.evaluate(array_format="torch")
+
+    for node_id, en in eg_32.enodes.items():
+        for op_id, eop in en.evaluable_outputs.items():
+            assert isinstance(eop.curr_value, torch.Tensor)
+            assert eop.curr_value.dtype == torch.float32
+            assert np.allclose(
+                eop.curr_value.numpy(),
+                eg.enodes[node_id].evaluable_outputs[op_id].curr_value,
+                rtol=1e-5,
+            )
+
+
+def test_torch_function_fallback():
+    pytest.importorskip("torch")
+
+    node = Node(id="node")
+    node.parameters.append(Parameter(id="a", value=2))
+    node.parameters.append(Parameter(id="b", value=3))
+    node.parameters.append(
+        Parameter(id="prod", function="MatMul", args={"A": "a", "B": "b"})
+    )
+    node.output_ports.append(OutputPort(id="out_port", value="prod"))
+    graph = Graph(id="matmul_scalars")
+    graph.nodes.append(node)
+
+    # The torch function fails on scalars, which is then reported by the expression evaluation as with numpy
+    for array_format in ["numpy", "torch"]:
+        with pytest.raises(Exception, match="Could not evaluate"):
+            EvaluableGraph(graph, verbose=False).evaluate(array_format=array_format)
+
+
+def test_profile(tmpdir):
+    import json
+
+    graph = load_mdf("examples/MDF/ABCD.json").graphs[0]
+    eg = EvaluableGraph(graph, verbose=False, profile=True)
+    for i in range(3):
+        eg.evaluate()
+
+    rows = {(row["node"], row["kind"], row["id"]): row for row in eg.profiler.report()}
+    assert rows[("B", "node", "B")]["calls"] == 3
+    assert rows[("B", "parameter", "logistic_func")]["calls"] == 3
+    assert rows[("B", "parameter", "logistic_func")]["expr_evaluations"] > 0
+    assert rows[("D", "edge", "edge_C_D")]["calls"] == 3
+    assert rows[("B", "node", "B")]["time"] >= rows[("B", "parameter", "gain")]["time"]
+
+    filename = str(tmpdir.join("profile.json"))
+    eg.profiler.to_json(filename)
+    with open(filename) as f:
+        assert json.load(f) == json.loads(eg.profiler.to_json())
+
+    assert EvaluableGraph(graph, verbose=False).profiler is None
+
+    graph = load_mdf("examples/ONNX/abc_basic-mdf.json").graphs[0]
+    eg = EvaluableGraph(graph, verbose=False, profile=True)
+    eg.evaluate(initializer={"input": np.ones((2, 3))})
+    assert sum(row["onnx_calls"] for row in eg.profiler.report()) == len(graph.nodes)
+    assert all(
+        row["bytes"] > 0 for row in eg.profiler.report() if row["kind"] == "output_port"
+    )
+
+
+def test_constant_parameters():
+    node = Node(id="node")
+    node.input_ports.append(InputPort(id="in_port"))
+    node.parameters.append(Parameter(id="slope", value=[[1, 2], [3, 4]]))
+    node.parameters.append(Parameter(id="double_slope", value="2 * slope"))
+    node.parameters.append(Parameter(id="noise", value="numpy.random.random() + slope"))
+    node.parameters.append(Parameter(id="scaled", value="slope * in_port"))
+    node.parameters.append(Parameter(id="count", value="count + 1"))
+    node.parameters.append(
+        Parameter(
+            id="lin",
+            function="linear",
+            args={"variable0": "in_port", "slope": "double_slope", "intercept": 1},
+        )
+    )
+    node.output_ports.append(OutputPort(id="out", value="lin"))
+    graph = Graph(id="constants")
+    graph.nodes.append(node)
+
+    eg = EvaluableGraph(graph, verbose=False)
+    en = eg.enodes["node"]
+    assert en.constant_ids == {"slope", "double_slope"}
+    assert en.evaluable_parameters["lin"].constant_args == {"slope", "intercept"}
+
+    eg.evaluate(initializer={"in_port": 1})
+    slope = en.evaluable_parameters["slope"].curr_value
+    for i in range(2, 4):
+        eg.evaluate(initializer={"in_port": i})
+        # Not re-evaluated from the list
+        assert en.evaluable_parameters["slope"].curr_value is slope
+        assert en.evaluable_parameters["count"].curr_value == i
+        assert np.allclose(en.evaluable_outputs["out"].curr_value, 2 * slope * i + 1)
+
+
+def test_constant_parameters_attribute_access():
+    node = Node(id="node")
+    node.input_ports.append(InputPort(id="in_port"))
+    node.parameters.append(Parameter(id="transposed", value="in_port.T * 2"))
+    node.output_ports.append(OutputPort(id="out", value="transposed"))
+    graph = Graph(id="attributes")
+    graph.nodes.append(node)
+
+    eg = EvaluableGraph(graph, verbose=False)
+    assert eg.enodes["node"].constant_ids == set()
+
+    eg.evaluate(initializer={"in_port": np.array([[1, 2]])})
+    assert np.array_equal(eg.enodes["node"].get_output("out"), [[2], [4]])
+    eg.evaluate(initializer={"in_port": np.array([[3, 4]])})
+    assert np.array_equal(eg.enodes["node"].get_output("out"), [[6], [8]])
+
+
+def test_incremental():
+    file_path = "examples/MDF/ABCD.json"
+
+    graph = load_mdf(file_path).graphs[0]
+    eg = EvaluableGraph(graph, verbose=False, incremental=True)
+    eg_other = EvaluableGraph(graph, verbose=False)
+    eg.evaluate()
+    eg.evaluate()
+    # Nothing changed, so nothing was evaluated again
+    assert {n: en.version for n, en in eg.enodes.items()} == {
+        "input0": 1,
+        "A": 1,
+        "B": 1,
+        "C": 1,
+        "D": 1,
+    }
+
+    gain = graph.get_node("B").get_parameter("gain").value
+    eg.set_parameter_value("B", "gain", 3)
+    # The model, and other graphs evaluating it, are left unchanged
+    assert graph.get_node("B").get_parameter("gain").value == gain
+    assert eg_other.enodes["B"].evaluable_parameters["gain"].value == gain
+    eg.evaluate()
+    # Only B and the nodes downstream of it were evaluated again
+    assert {n: en.version for n, en in eg.enodes.items()} == {
+        "input0": 1,
+        "A": 1,
+        "B": 2,
+        "C": 2,
+        "D": 2,
+    }
+
+    graph = load_mdf(file_path).graphs[0]
+    graph.get_node("B").get_parameter("gain").value = 3
+    eg_full = EvaluableGraph(graph, verbose=False)
+    eg_full.evaluate()
+    for node_id, en in eg_full.enodes.items():
+        for op_id, eop in en.evaluable_outputs.items():
+            assert np.allclose(
+                eop.curr_value, eg.enodes[node_id].evaluable_outputs[op_id].curr_value
+            )
+
+
+def _wide_test_graph(width):
+    """An input node, sending to **width** nodes which each scale it, all sending to an output node summing them."""
+    graph = Graph(id="wide_test")
+
+    source = Node(id="source")
+    source.input_ports.append(InputPort(id="input"))
+    source.output_ports.append(OutputPort(id="out_port", value="input"))
+    graph.nodes.append(source)
+
+    sink = Node(id="sink")
+    graph.nodes.append(sink)
+
+    for i in range(width):
+        node = Node(id="W%i" % i)
+        node.input_ports.append(InputPort(id="in_port"))
+        node.parameters.append(Parameter(id="scale", value=i))
+        node.output_ports.append(OutputPort(id="out_port", value="in_port * scale"))
+        graph.nodes.append(node)
+
+        sink.input_ports.append(InputPort(id="in_%i" % i))
+        graph.edges.append(
+            Edge(
+                id="source_W%i" % i,
+                sender="source",
+                sender_port="out_port",
+                receiver=node.id,
+                receiver_port="in_port",
+            )
+        )
+        graph.edges.append(
+            Edge(
+                id="W%i_sink" % i,
+                sender=node.id,
+                sender_port="out_port",
+                receiver="sink",
+                receiver_port="in_%i" % i,
+            )
+        )
+
+    sink.output_ports.append(
+        OutputPort(id="out_port", value=" + ".join("in_%i" % i for i in range(width)))
+    )
+    return graph
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_threads(incremental):
+    with EvaluableGraph(
+        _wide_test_graph(4), verbose=False, incremental=incremental, threads=4
+    ) as eg:
+        assert eg.static_passes == [["source"], ["W0", "W1", "W2", "W3"], ["sink"]]
+
+        eg.evaluate(initializer={"input": np.array([1.0, 2.0])})
+        assert np.allclose(eg.enodes["sink"].get_output("out_port"), [6.0, 12.0])
+
+        eg.set_parameter_value("W3", "scale", 10)
+        eg.evaluate(initializer={"input": np.array([1.0, 2.0])})
+        assert np.allclose(eg.enodes["sink"].get_output("out_port"), [13.0, 26.0])
+
+    # Closed, but can still be evaluated without the threads
+    assert eg._executor is None
+    eg.evaluate(initializer={"input": np.array([1.0, 1.0])})
+    assert np.allclose(eg.enodes["sink"].get_output("out_port"), [13.0, 13.0])
+
+
+def test_threads_scheduler():
+    file_path = "examples/MDF/abc_conditions.json"
+
+    eg = EvaluableGraph(load_mdf(file_path).graphs[0], verbose=False, threads=2)
+    assert eg.static_passes is None
+    eg.evaluate()
+    eg.close()
+
+    eg_serial = EvaluableGraph(load_mdf(file_path).graphs[0], verbose=False)
+    eg_serial.evaluate()
+    for node_id, en in eg_serial.enodes.items():
+        for op_id, eop in en.evaluable_outputs.items():
+            assert np.allclose(
+                eop.curr_value, eg.enodes[node_id].evaluable_outputs[op_id].curr_value
+            )
+
+
+def test_evaluate_batch():
+    graph = _batch_test_graph()
+    samples = np.random.RandomState(0).random_sample((5, 3))
+
+    eg = EvaluableGraph(graph, verbose=False)
+    outputs = eg.evaluate_batch({"input": samples})
+
+    assert outputs["B"]["out_port"].shape == (5, 3)
+    assert outputs["C"]["out_port"].shape == (5, 3)
+    assert np.allclose(outputs["C"]["out_port"], [1.0, 2.0, 3.0])
+
+    for i, sample in enumerate(samples):
+        eg_single = EvaluableGraph(graph, verbose=False)
+        eg_single.evaluate(initializer={"input": sample})
+        assert np.allclose(
+            outputs["B"]["out_port"][i],
+            eg_single.enodes["B"].evaluable_outputs["out_port"].curr_value,
+        )
+
+
+def test_evaluate_batch_bad_inputs():
+    eg = EvaluableGraph(_batch_test_graph(), verbose=False)
+
+    with pytest.raises(ValueError):
+        eg.evaluate_batch({"not_an_input": np.zeros((2, 3))})
+
+    with pytest.raises(ValueError):
+        eg.evaluate_batch({"input": 1.0})
+
+
+def test_evaluate_batch_shared_input_port_id():
+    graph = Graph(id="shared_input")
+    for node_id, scale in [("A", 2), ("B", 3)]:
+        node = Node(id=node_id)
+        node.input_ports.append(InputPort(id="input", shape="(2,)"))
+        node.output_ports.append(OutputPort(id="out_port", value="input * %i" % scale))
+        graph.nodes.append(node)
+
+    samples = np.arange(6.0).reshape(3, 2)
+    outputs = EvaluableGraph(graph, verbose=False).evaluate_batch({"input": samples})
+
+    assert outputs["A"]["out_port"].shape == (3, 2)
+    assert outputs["B"]["out_port"].shape == (3, 2)
+    assert np.allclose(outputs["A"]["out_port"], 2 * samples)
+    assert np.allclose(outputs["B"]["out_port"], 3 * samples)
+
+
+def test_evaluate_batch_reduced_output():
+    graph = _batch_test_graph()
+    graph.get_node("B").output_ports.append(
+        OutputPort(id="sum_port", value="numpy.sum(in_port)")
+    )
+    eg = EvaluableGraph(graph, verbose=False)
+
+    # The sum over the batch must not be broadcast as if it were a constant
+    with pytest.raises(ValueError, match="sum_port"):
+        eg.evaluate_batch({"input": np.ones((5, 3))})
+
+
+def test_run():
+    graph = load_mdf("examples/MDF/States.json").graphs[0]
+    dt = 0.01
+
+    # Record by hand
+    eg = EvaluableGraph(graph, verbose=False)
+    expected = []
+    for i in range(21):
+        eg.evaluate(time_increment=None if i == 0 else dt)
+        expected.append(eg.enodes["sine_node"].evaluable_outputs["out_port"].curr_value)
+
+    recorded = EvaluableGraph(graph, verbose=False).run(
+        0.2, dt, record=["sine_node.out_port", ("counter_node", "count")]
+    )
+    assert recorded["time"].shape == (21,)
+    assert np.allclose(recorded["time"][-1], 0.2)
+    assert np.allclose(recorded["sine_node.out_port"], expected)
+    assert recorded["counter_node.count"].shape == (21,)
+
+    decimated = EvaluableGraph(graph, verbose=False).run(
+        0.2, dt, record=["sine_node.out_port"], decimation=4
+    )
+    assert np.allclose(decimated["time"], recorded["time"][::4])
+    assert np.allclose(decimated["sine_node.out_port"], expected[::4])
+
+    with pytest.raises(ValueError):
+        EvaluableGraph(graph, verbose=False).run(0.2, dt, record=["sine_node.nope"])
+
+
+def test_integrators():
+    graph = load_mdf("examples/MDF/States.json").graphs[0]
+    dt = 0.02
+
+    # level and rate make up a harmonic oscillator, with level(t) = sin(2 * pi * t / period)
+    errors = {}
+    for integrator in ["euler", "rk4", "rk45"]:
+        recorded = EvaluableGraph(graph, verbose=False, integrator=integrator).run(
+            0.8, dt, record=["sine_node.out_port", "counter_node.count"]
+        )
+        expected = 3 * np.sin(6.283185 * recorded["time"] / 0.4)
+        errors[integrator] = np.max(np.abs(recorded["sine_node.out_port"] - expected))
+
+        # Parameters without a time derivative are still only updated once per time step
+        assert np.allclose(recorded["counter_node.count"], np.arange(1, 42))
+
+    assert errors["rk4"] < 1e-2 < errors["euler"]
+    assert errors["rk45"] < 1e-4
+
+    with pytest.raises(ValueError):
+        EvaluableGraph(graph, verbose=False, integrator="nope")
+
+
+@pytest.mark.parametrize("integrator", ["euler", "rk4", "rk45"])
+def test_integrators_keep_dtype(integrator):
+    graph = Graph(id="decay")
+    node = Node(id="node")
+    node.parameters.append(
+        Parameter(
+            id="x",
+            default_initial_value=np.array([1.0, 2.0], dtype=np.float32),
+            time_derivative="-x",
+        )
+    )
+    node.output_ports.append(OutputPort(id="out_port", value="x"))
+    graph.nodes.append(node)
+
+    eg = EvaluableGraph(graph, verbose=False, integrator=integrator)
+    eg.evaluate()
+    eg.evaluate(time_increment=0.1)
+
+    x = eg.enodes["node"].evaluable_parameters["x"].curr_value
+    assert x.dtype == np.float32
+    assert np.allclose(x, np.exp(-0.1) * np.array([1.0, 2.0]), rtol=1e-2)
+
+
+@pytest.mark.parametrize("integrator", ["euler", "rk45"])
+def test_reset(integrator):
+    eg = EvaluableGraph(
+        load_mdf("examples/MDF/States.json").graphs[0],
+        verbose=False,
+        integrator=integrator,
+    )
+    record = ["sine_node.out_port", "counter_node.count"]
+    first = eg.run(0.2, 0.02, record=record)
+    eg.reset()
+    second = eg.run(0.2, 0.02, record=record)
+    for name in record:
+        assert np.allclose(first[name], second[name])
+    assert np.allclose(second["counter_node.count"], np.arange(1, 12))
+
+
+def test_reset_scheduler():
+    eg = EvaluableGraph(
+        load_mdf("examples/MDF/abc_conditions.json").graphs[0], verbose=False
+    )
+    eg.evaluate()
+    counts = {
+        node_id: en.evaluable_parameters["count_%s" % node_id[-1]].curr_value
+        for node_id, en in eg.enodes.items()
+    }
+    assert counts == {"input0": 1, "A": 7, "B": 3, "C": 2}
+
+    eg.reset()
+    assert eg.scheduler.get_clock(None).simple_time.environment_state_update == 0
+    eg.evaluate()
+    assert {
+        node_id: en.evaluable_parameters["count_%s" % node_id[-1]].curr_value
+        for node_id, en in eg.enodes.items()
+    } == counts
+
+
+def test_run_hdf5(tmpdir):
+    h5py = pytest.importorskip("h5py")
+
+    graph = load_mdf("examples/MDF/States.json").graphs[0]
+    recorded = EvaluableGraph(graph, verbose=False).run(
+        0.2, 0.01, record=["sine_node.out_port"]
+    )
+
+    with h5py.File(str(tmpdir.join("run.h5")), "w") as f:
+        EvaluableGraph(graph, verbose=False).run(
+            0.2, 0.01, record=["sine_node.out_port"], hdf5_group=f, chunk_size=8
+        )
+        assert np.allclose(f["time"][:], recorded["time"])
+        assert np.allclose(f["sine_node.out_port"][:], recorded["sine_node.out_port"])
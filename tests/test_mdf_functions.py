@@ -38,3 +38,74 @@ def test_std_functions(name, expected_result, parameters):
         assert numpy.array_equal(
             stdf.mdf_functions[name]["function"](**parameters), expected_result
         )
+
+
+# Budget (in seconds) for importing the MDF function ontology in a fresh interpreter
+IMPORT_TIME_BUDGET = 5.0
+
+
+def test_std_functions_import_time():
+    """Importing the standard functions should not define any ONNX or ACT-R functions, or import their backends."""
+    import subprocess
+    import sys
+    import json
+
+    script = "\n".join(
+        [
+            "import json, sys, time",
+            "start = time.perf_counter()",
+            "import modeci_mdf.functions.standard as stdf",
+            "elapsed = time.perf_counter() - start",
+            "n_defined = len(stdf.mdf_functions._functions)",
+            "modules = [m for m in ('skl2onnx', 'onnxruntime') if m in sys.modules]",
+            "print(json.dumps({'elapsed': elapsed, 'n_defined': n_defined, 'modules': modules}))",
+        ]
+    )
+    result = json.loads(
+        subprocess.check_output([sys.executable, "-c", script])
+        .decode()
+        .splitlines()[-1]
+    )
+
+    assert result["modules"] == []
+    assert result["n_defined"] < 20
+    assert result["elapsed"] < IMPORT_TIME_BUDGET
+
+
+def test_onnx_functions_registered_lazily():
+    assert "onnx::Add" in stdf.mdf_functions
+    assert stdf.mdf_functions["onnx::Add"]["arguments"] == ["A", "B"]
+    assert "change_goal" in stdf.mdf_functions
+    assert "not_a_function" not in stdf.mdf_functions
+    assert len(list(stdf.mdf_functions)) == len(stdf.mdf_functions)
+
+
+@pytest.mark.parametrize("name", ["logistic", "exponential", "sin", "cos", "Relu"])
+def test_std_functions_arrays(name):
+    """The standard functions should work elementwise on arrays, and in place if given an out array"""
+    arguments = stdf.mdf_functions[name]["arguments"]
+    x = numpy.linspace(-1, 1, 12).reshape((3, 4))
+    parameters = {arg: 0.5 for arg in arguments}
+    parameters[arguments[0]] = x
+
+    result = stdf.mdf_functions[name]["function"](**parameters)
+    expected = [
+        stdf.mdf_functions[name]["function"](**{**parameters, arguments[0]: v})
+        for v in x.flat
+    ]
+    assert result.shape == x.shape
+    assert numpy.allclose(result.flat, expected)
+
+    out = numpy.empty_like(x)
+    assert stdf.mdf_functions[name]["function"](**parameters, out=out) is out
+    assert numpy.allclose(out, result)
+
+
+def test_create_python_expression():
+    assert stdf.create_python_expression("exp(x) + math.exp(x)") == (
+        "numpy.exp(x) + math.exp(x)"
+    )
+    assert stdf.create_python_expression("sin(x) * cos(x)") == (
+        "numpy.sin(x) * numpy.cos(x)"
+    )
+    assert stdf.create_python_expression("numpy.maximum(A,0)") == "numpy.maximum(A,0)"
@@ -11,7 +11,7 @@ from modeci_mdf.mdf import (
     InputPort,
 )
 
-from modeci_mdf.utils import load_mdf
+from modeci_mdf.utils import load_mdf, get_expression_symbols
 import pytest
 
 
@@ -256,6 +256,120 @@ def test_graph_inputs_none(simple_model_mdf):
     assert len(simple_model_mdf.graphs[0].inputs) == 0
 
 
+def test_graph_get_node_edge():
+    """Test that indexed lookups of nodes, edges and parameters stay consistent as the graph is modified"""
+    mod_graph = Graph(id="lookup_example")
+    for i in range(3):
+        node = Node(id=f"node{i}")
+        node.parameters.append(Parameter(id="p", value=i))
+        mod_graph.nodes.append(node)
+
+    assert mod_graph.get_node("node1").id == "node1"
+    assert mod_graph.get_node("missing") is None
+    assert mod_graph.get_node({"not": "an id"}) is None
+
+    # Nodes appended after a lookup are found
+    mod_graph.nodes.append(Node(id="node3"))
+    assert mod_graph.get_node("node3") is mod_graph.nodes[3]
+
+    # As are nodes replaced in place
+    new_node1 = Node(id="new_node1")
+    mod_graph.nodes[1] = new_node1
+    assert mod_graph.get_node("new_node1") is new_node1
+    assert mod_graph.get_node("node1") is None
+
+    mod_graph.edges.append(
+        Edge(
+            id="e0",
+            sender="node0",
+            receiver="node2",
+            sender_port="o",
+            receiver_port="i",
+        )
+    )
+    assert mod_graph.get_edge("e0").receiver == "node2"
+    assert mod_graph.get_edge("e1") is None
+
+    node0 = mod_graph.get_node("node0")
+    assert node0.get_parameter("p").value == 0
+    node0.parameters.append(Parameter(id="q", value=1))
+    assert node0.get_parameter("q").value == 1
+    assert node0.get_parameter("r") is None
+
+
+def test_graph_ordered_nodes():
+    """Test the topological ordering of nodes and edges, with and without cycles"""
+    mod_graph = Graph(id="order_example")
+    for node_id in ["C", "B", "A", "D"]:
+        mod_graph.nodes.append(Node(id=node_id))
+
+    for sender, receiver in [("A", "B"), ("B", "C"), ("A", "C")]:
+        mod_graph.edges.append(
+            Edge(
+                id=f"{sender}_{receiver}",
+                sender=sender,
+                receiver=receiver,
+                sender_port="out",
+                receiver_port="in",
+            )
+        )
+
+    assert [n.id for n in mod_graph.get_ordered_nodes()] == ["A", "D", "B", "C"]
+    assert [e.id for e in mod_graph.get_ordered_edges()] == ["A_B", "A_C", "B_C"]
+
+    # Close a cycle between B and C
+    mod_graph.edges.append(
+        Edge(id="C_B", sender="C", receiver="B", sender_port="out", receiver_port="in")
+    )
+    with pytest.raises(ValueError, match="cycle"):
+        mod_graph.get_ordered_nodes()
+
+    assert [n.id for n in mod_graph.get_ordered_nodes(allow_cycles=True)] == [
+        "A",
+        "D",
+        "C",
+        "B",
+    ]
+    assert [e.id for e in mod_graph.get_ordered_edges(allow_cycles=True)] == [
+        "A_B",
+        "A_C",
+        "C_B",
+        "B_C",
+    ]
+
+    mod_graph.edges.append(
+        Edge(id="X_A", sender="X", receiver="A", sender_port="out", receiver_port="in")
+    )
+    with pytest.raises(ValueError, match="not in graph"):
+        mod_graph.get_ordered_nodes()
+
+
+@pytest.mark.parametrize(
+    "expr, symbols",
+    [
+        ("a * math.exp(-b) + 2", ("a", "b")),
+        ("[input_port1, [gain, 1.5]]", ("gain", "input_port1")),
+        ("numpy.maximum(x, x)", ("x",)),
+        ("A.T * x", ("A", "x")),
+        ("x.shape[0] + y", ("x", "y")),
+        ("onnx_ops.relu(A.T)", ("A",)),
+        ("sin(t) if t > t0 else 0", ("t", "t0")),
+        (1.5, ()),
+    ],
+)
+def test_get_expression_symbols(expr, symbols):
+    assert get_expression_symbols(expr) == symbols
+
+
+def test_parameter_is_stateful():
+    assert Parameter(id="v", value="v + 1").is_stateful()
+    assert not Parameter(id="v", value="v0 + 1").is_stateful()
+    assert Parameter(id="x", value="x.T + 1").is_stateful()
+    assert Parameter(id="x", value="numpy.zeros(x.shape)").is_stateful()
+    assert Parameter(id="v", default_initial_value=0, time_derivative="1").is_stateful()
+    assert not Parameter(id="v", value=1).is_stateful()
+
+
 def test_graph_types(tmpdir):
     r"""
     Test whether types saved in parameters are the same after reloading
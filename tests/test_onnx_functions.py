@@ -98,3 +98,46 @@ def test_concat():
     input = (np.ones(3), np.ones(3), np.ones(3))
     out = onnx_ops.concat(*input, axis=0)
     assert np.allclose(out, np.concatenate(input, axis=0))
+
+
+def test_session_cache():
+    """Repeated calls of an operator with the same input types should reuse the onnxruntime session"""
+    from modeci_mdf.functions.onnx import _onnx_session_cache, clear_onnx_session_cache
+
+    clear_onnx_session_cache()
+
+    for i in range(3):
+        A = np.ones((2, 3)) * i
+        assert np.allclose(onnx_ops.add(A, A), A + A)
+    assert len(_onnx_session_cache) == 1
+
+    # Different dtype needs a new session
+    A = np.ones((2, 3), dtype=np.float32)
+    assert np.allclose(onnx_ops.add(A, A), A + A)
+    assert len(_onnx_session_cache) == 2
+
+    # Different attributes need a new session
+    x = np.zeros((3, 2))
+    pads = np.array([0, 1, 0, 1]).astype(np.int64)
+    out = onnx_ops.pad(x, pads, np.array(1.5), mode="constant")
+    out2 = onnx_ops.pad(x, pads, np.array(1.5), mode="edge")
+    assert len(_onnx_session_cache) == 4
+    assert not np.allclose(out, out2)
+
+
+def test_kwargs_call():
+    """Calls with the argument mapping worked out once should match the generated functions"""
+    pad = onnx_ops.make_onnx_kwargs_call(
+        onnx_ops.get_onnx_schema("pad"), ("mode", "data", "pads", "constant_value")
+    )
+    x = np.zeros((3, 2))
+    pads = np.array([0, 1, 0, 1]).astype(np.int64)
+    assert np.all(
+        pad("constant", x, pads, np.array(1.5))
+        == onnx_ops.pad(x, pads, np.array(1.5), mode="constant")
+    )
+
+    concat = onnx_ops.make_onnx_kwargs_call(
+        onnx_ops.get_onnx_schema("concat"), ("a", "axis", "b")
+    )
+    assert np.allclose(concat(np.ones(3), 0, np.zeros(2)), [1, 1, 1, 0, 0])
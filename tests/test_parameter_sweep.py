@@ -0,0 +1,125 @@
+"""
+Tests for evaluating MDF models over grids of parameter values, see modeci_mdf.parameter_sweep.
+"""
+import pytest
+import numpy as np
+
+import modeci_mdf
+from modeci_mdf.mdf import Model, Graph, Node, InputPort, OutputPort, Parameter
+from modeci_mdf.execution_engine import EvaluableGraph
+
+
+def _example_model(node_id="A"):
+    """A node like that of utils.create_example_node, a logistic followed by a linear function of its input."""
+    model = Model(id="sweep_test")
+    graph = Graph(id="sweep_test")
+    model.graphs.append(graph)
+
+    a = Node(id=node_id)
+    a.input_ports.append(InputPort(id="input_port1", shape="(1,)"))
+    a.parameters.append(Parameter(id="logistic_gain", value=3))
+    a.parameters.append(Parameter(id="slope", value=0.5))
+    a.parameters.append(Parameter(id="intercept", value=0))
+    a.parameters.append(
+        Parameter(
+            id="logistic_1",
+            function="logistic",
+            args={
+                "variable0": "input_port1",
+                "gain": "logistic_gain",
+                "bias": 0,
+                "offset": 0,
+            },
+        )
+    )
+    a.parameters.append(
+        Parameter(
+            id="linear_1",
+            function="linear",
+            args={
+                "variable0": "logistic_1",
+                "slope": "slope",
+                "intercept": "intercept",
+            },
+        )
+    )
+    a.output_ports.append(OutputPort(id="output_1", value="linear_1"))
+    graph.nodes.append(a)
+
+    return model
+
+
+def _evaluate(gain, slope):
+    model = _example_model()
+    node = model.graphs[0].get_node("A")
+    node.get_parameter("logistic_gain").value = gain
+    node.get_parameter("slope").value = slope
+    eg = EvaluableGraph(model.graphs[0], verbose=False)
+    eg.evaluate(initializer={"input_port1": np.array([0.5])})
+    return eg.enodes["A"].get_output("output_1")
+
+
+def test_sweep_grid():
+    gains = [1, 2, 3]
+    slopes = [0.5, 1.5]
+    results = modeci_mdf.sweep(
+        _example_model(),
+        {"A.logistic_gain": gains, "A.slope": slopes},
+        outputs=["A.output_1"],
+        workers=2,
+        initializer={"input_port1": np.array([0.5])},
+    )
+
+    assert results.shape == (3, 2, 1, 1)
+    for i, gain in enumerate(gains):
+        for j, slope in enumerate(slopes):
+            assert np.allclose(results[i, j, 0], _evaluate(gain, slope))
+
+
+def test_sweep_points():
+    points = [
+        {"A.slope": 2, "A.logistic_gain": 1},
+        {"A.slope": 3, "A.logistic_gain": 4},
+    ]
+    results = modeci_mdf.sweep(
+        _example_model(),
+        points,
+        outputs=["A.output_1"],
+        workers=1,
+        initializer={"input_port1": np.array([0.5])},
+        compiled=True,
+    )
+
+    assert results.shape == (2, 1, 1)
+    assert np.allclose(results[0, 0], _evaluate(1, 2))
+    assert np.allclose(results[1, 0], _evaluate(4, 3))
+
+
+def test_sweep_node_id_with_dots():
+    results = modeci_mdf.sweep(
+        _example_model("layer.A"),
+        {"layer.A.logistic_gain": [1, 2], ("layer.A", "slope"): [3]},
+        outputs=["layer.A.output_1"],
+        workers=1,
+        initializer={"input_port1": np.array([0.5])},
+    )
+
+    assert results.shape == (2, 1, 1, 1)
+    assert np.allclose(results[0, 0, 0], _evaluate(1, 3))
+    assert np.allclose(results[1, 0, 0], _evaluate(2, 3))
+
+
+@pytest.mark.parametrize(
+    "param_grid, outputs",
+    [
+        ({"A.unknown": [1]}, ["A.output_1"]),
+        ({"B.slope": [1]}, ["A.output_1"]),
+        ({"A.slope": [1]}, ["A.unknown"]),
+        ({"slope": [1]}, ["A.output_1"]),
+        ({"A.slope": []}, ["A.output_1"]),
+        ({"A.slope.x": [1]}, ["A.output_1"]),
+    ],
+)
+def test_sweep_bad_arguments(param_grid, outputs):
+    with pytest.raises(ValueError):
+        modeci_mdf.sweep(_example_model(), param_grid, outputs=outputs, workers=1)